@@ -0,0 +1,99 @@
+"""Compare EPUB extraction throughput and peak memory.
+
+Builds a synthetic EPUB (or uses one given on the command line) and runs
+each extraction mode in a fresh interpreter so the reported peak RSS is
+not polluted by the other mode::
+
+    python benchmarks/bench_epub.py --size-mb 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+PACKAGE = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" xmlns:dc="http://purl.org/dc/elements/1.1/"
+         version="3.0" unique-identifier="id">
+  <metadata><dc:identifier id="id">bench</dc:identifier><dc:title>Bench</dc:title>
+  <dc:language>en</dc:language></metadata>
+  <manifest>{items}</manifest>
+  <spine>{refs}</spine>
+</package>"""
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+PARAGRAPH = "<p>" + "Typography is the art of arranging type. " * 20 + "</p>\n"
+
+
+def build_epub(path: Path, size_mb: int, chapters: int = 20) -> None:
+    per_chapter = max(1, size_mb * 1024 * 1024 // chapters // len(PARAGRAPH))
+    items, refs = [], []
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("mimetype", "application/epub+zip", zipfile.ZIP_STORED)
+        zf.writestr("META-INF/container.xml", CONTAINER)
+        for n in range(chapters):
+            name = f"ch{n}.xhtml"
+            with zf.open(name, "w") as out:
+                out.write(f'<html xmlns="http://www.w3.org/1999/xhtml"><body><h1>Chapter {n}</h1>\n'.encode())
+                block = PARAGRAPH.encode() * 100
+                for _ in range(per_chapter // 100):
+                    out.write(block)
+                out.write(b"</body></html>")
+            items.append(f'<item id="c{n}" href="{name}" media-type="application/xhtml+xml"/>')
+            refs.append(f'<itemref idref="c{n}"/>')
+        zf.writestr("content.opf", PACKAGE.format(items="".join(items), refs="".join(refs)))
+
+
+def run_mode(mode: str, path: Path) -> None:
+    from ingestion import document_ingestor
+
+    start = time.perf_counter()
+    chars = 0
+    if mode == "legacy":
+        sections = document_ingestor.extract_epub(path)
+    else:
+        sections = document_ingestor.iter_epub_sections(path)
+    for sec in sections:
+        chars += len(sec["text"])
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{mode:>9}: {elapsed:7.2f}s  {chars / elapsed / 1e6:7.1f} Mchars/s  "
+        f"peak RSS {peak_mb:8.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark EPUB extraction")
+    parser.add_argument("epub", nargs="?", help="EPUB to extract (default: synthetic)")
+    parser.add_argument("--size-mb", type=int, default=100, help="Uncompressed size of the synthetic book")
+    parser.add_argument("--mode", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, Path(args.epub))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.epub) if args.epub else Path(tmp) / "bench.epub"
+        if not args.epub:
+            build_epub(path, args.size_mb)
+        for mode in ("legacy", "streaming"):
+            subprocess.run([sys.executable, __file__, str(path), "--mode", mode], check=True)
+
+
+if __name__ == "__main__":
+    main()
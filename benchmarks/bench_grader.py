@@ -0,0 +1,94 @@
+"""Compare the bit-parallel edit distance with a textbook DP and time grading.
+
+Generates flashcard-style answer sentences and typed answers with typos,
+dropped and reordered words, checks that both distance implementations
+agree, and reports distances per second for each plus full grades per
+second::
+
+    python benchmarks/bench_grader.py --pairs 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from learning import answer_grader
+
+WORDS = (
+    "the cell membrane controls which molecules enter and leave while enzymes "
+    "speed up chemical reactions inside mitochondria that release energy from glucose"
+).split()
+
+
+def naive_levenshtein(a: str, b: str) -> int:
+    """Row-by-row dynamic programming, O(len(a) * len(b))."""
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+
+
+def make_pairs(n: int, seed: int = 0) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(n):
+        expected = rng.sample(WORDS, rng.randint(6, 14))
+        given = [_typo(w, rng) if rng.random() < 0.2 else w for w in expected if rng.random() > 0.1]
+        if rng.random() < 0.3:
+            rng.shuffle(given)
+        pairs.append((" ".join(given), " ".join(expected).capitalize() + "."))
+    return pairs
+
+
+def timed(func, pairs) -> Tuple[float, list]:
+    start = time.perf_counter()
+    results = [func(a, b) for a, b in pairs]
+    return time.perf_counter() - start, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark fuzzy answer grading")
+    parser.add_argument("--pairs", type=int, default=5000, help="Answer pairs to grade")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    pairs = make_pairs(args.pairs, args.seed)
+    normalized = [(answer_grader.normalize(a), answer_grader.normalize(b)) for a, b in pairs]
+    avg_len = sum(len(a) + len(b) for a, b in normalized) / (2 * len(normalized))
+
+    naive_time, naive = timed(naive_levenshtein, normalized)
+    fast_time, fast = timed(answer_grader.levenshtein, normalized)
+    if naive != fast:
+        raise SystemExit("bit-parallel and DP distances disagree")
+    grade_time, grades = timed(answer_grader.grade, pairs)
+
+    verdicts = {v: sum(g["verdict"] == v for g in grades) for v in ("correct", "close", "incorrect")}
+    print(f"{len(pairs)} pairs, average normalized length {avg_len:.0f} chars")
+    print(f"naive DP:      {len(pairs) / naive_time:10.0f} distances/s")
+    print(
+        f"bit-parallel:  {len(pairs) / fast_time:10.0f} distances/s "
+        f"({naive_time / fast_time:.1f}x faster)"
+    )
+    print(f"full grade:    {len(pairs) / grade_time:10.0f} answers/s  {verdicts}")
+
+
+if __name__ == "__main__":
+    main()
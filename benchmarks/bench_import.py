@@ -0,0 +1,72 @@
+"""Measure the cold import cost of the web app with ``python -X importtime``.
+
+Runs two fresh interpreters: one that only imports ``ui/app.py`` (the
+ingestors and their parsing libraries stay unloaded until a matching
+upload arrives) and one that also imports every ingestor with its
+libraries, which is what every worker paid before the lazy registry::
+
+    python benchmarks/bench_import.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("fitz", "pymupdf", "ebooklib", "lxml")
+
+SNIPPETS = {
+    "lazy": "import app",
+    "eager": (
+        "import app\n"
+        "import fitz, ebooklib, ebooklib.epub, lxml.html\n"
+        "from ingestion import registry\n"
+        "for ext in registry.supported_extensions():\n"
+        "    registry.get_ingestor(ext)\n"
+    ),
+}
+
+LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(snippet: str) -> tuple[int, set[str]]:
+    """Return total cumulative microseconds and top-level modules imported."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", snippet],
+        cwd=BASE_DIR / "ui",
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.add(name.split(".")[0])
+        if len(indent) == 1:  # top-level imports only, nested ones are included
+            total += int(cumulative)
+    return total, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark app import time")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per mode (best is reported)")
+    args = parser.parse_args()
+
+    for mode, snippet in SNIPPETS.items():
+        runs = [measure(snippet) for _ in range(args.repeat)]
+        best = min(total for total, _ in runs)
+        heavy = sorted(m for m in runs[0][1] if m in HEAVY_MODULES)
+        print(f"{mode:>5}: {best / 1000:8.1f} ms  heavy modules: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""Replay scripted learner sessions against the web app and report latency.
+
+By default the app is imported in-process and driven through Flask's test
+client from ``--users`` threads. Every data file the app touches is moved
+into a scratch directory that is seeded with a synthetic review queue and
+flashcards, so nothing in the checkout is modified. With ``--url`` the
+same sessions are sent over HTTP to a server already running on
+localhost; that server uses its own data files.
+
+Each user repeatedly picks a session from ``--mix`` (weights per session
+type) until ``--duration`` seconds have passed::
+
+    python benchmarks/load_test.py --users 8 --duration 20
+    python benchmarks/load_test.py --mix review=5,quiz=3,dashboard=2 --cards 10
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --users 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+DEFAULT_MIX = "review=4,quiz=3,dashboard=2,clip=1,upload=1"
+SEED_CARDS = 2000
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+WORDS = (
+    "cell energy membrane protein enzyme light water carbon nitrogen signal "
+    "gradient pathway receptor molecule structure function system process"
+).split()
+
+
+def synthetic_document(rng: random.Random, sections: int = 6, words: int = 300) -> bytes:
+    parts = []
+    for n in range(sections):
+        body = " ".join(rng.choice(WORDS) for _ in range(words))
+        parts.append(f"# Topic {n + 1}\n\n{body}.\n")
+    return "\n".join(parts).encode("utf-8")
+
+
+class Recorder:
+    """Thread-safe collection of ``(route, seconds, ok)`` samples."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, route: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.samples[route].append(seconds)
+            if not ok:
+                self.errors[route] += 1
+
+
+class Client:
+    """Issue requests through a Flask test client or to a local server."""
+
+    def __init__(self, recorder: Recorder, app=None, url: Optional[str] = None) -> None:
+        self.recorder = recorder
+        self.url = url.rstrip("/") if url else None
+        self.test_client = app.test_client() if app is not None else None
+
+    def request(
+        self,
+        route: str,
+        method: str,
+        path: str,
+        json_body=None,
+        form: Optional[Dict[str, str]] = None,
+        file: Optional[Tuple[str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes, Dict[str, str]]:
+        """Send one request, record its latency under *route* and return
+        ``(status, body, headers)``. Status 0 means the request raised.
+        """
+        start = time.perf_counter()
+        try:
+            if self.test_client is not None:
+                status, body, resp_headers = self._local(method, path, json_body, form, file, headers)
+            else:
+                status, body, resp_headers = self._remote(method, path, json_body, form, file, headers)
+        except Exception:
+            status, body, resp_headers = 0, b"", {}
+        self.recorder.add(route, time.perf_counter() - start, 0 < status < 400)
+        return status, body, resp_headers
+
+    def _local(self, method, path, json_body, form, file, headers):
+        kwargs = {"method": method, "headers": headers or {}}
+        if json_body is not None:
+            kwargs["json"] = json_body
+        elif form is not None or file is not None:
+            data = dict(form or {})
+            if file is not None:
+                data["file"] = (io.BytesIO(file[1]), file[0])
+            kwargs["data"] = data
+            kwargs["content_type"] = "multipart/form-data"
+        resp = self.test_client.open(path, **kwargs)
+        return resp.status_code, resp.get_data(), dict(resp.headers)
+
+    def _remote(self, method, path, json_body, form, file, headers):
+        headers = dict(headers or {})
+        data = None
+        if json_body is not None:
+            data = json.dumps(json_body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        elif file is not None:
+            boundary = uuid.uuid4().hex
+            data = _multipart(boundary, form or {}, file)
+            headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+        elif form is not None:
+            data = urlencode(form).encode("ascii")
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        req = urllib.request.Request(self.url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=60) as resp:
+                return resp.status, resp.read(), dict(resp.headers)
+        except urllib.error.HTTPError as e:
+            # 304 and redirects are surfaced as HTTPError by urllib.
+            return e.code, e.read(), dict(e.headers)
+
+
+def _multipart(boundary: str, form: Dict[str, str], file: Tuple[str, bytes]) -> bytes:
+    lines = []
+    for name, value in form.items():
+        lines.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    filename, content = file
+    lines.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n".encode()
+        + content
+        + b"\r\n"
+    )
+    lines.append(f"--{boundary}--\r\n".encode())
+    return b"".join(lines)
+
+
+# -- sessions -----------------------------------------------------------------
+
+
+def review_session(client: Client, rng: random.Random, args) -> None:
+    """Fetch a page of due cards, answer them in one batch, reload /review."""
+    status, body, _ = client.request(
+        "GET /api/review/due", "GET", f"/api/review/due?limit={args.cards}"
+    )
+    if status != 200:
+        return
+    cards = json.loads(body).get("cards", [])
+    results = [
+        {"id": uuid.uuid4().hex, "card_id": card["id"], "correct": rng.random() < 0.75}
+        for card in cards
+    ]
+    if results:
+        client.request("POST /api/review/results", "POST", "/api/review/results", json_body={"results": results})
+    client.request("GET /review", "GET", "/review")
+
+
+def quiz_session(client: Client, rng: random.Random, args) -> None:
+    """Page through a few quiz cards, submitting an answer for each."""
+    start = rng.randrange(SEED_CARDS)
+    for index in range(start, start + args.cards):
+        client.request("GET /quiz", "GET", f"/quiz?index={index}")
+        client.request(
+            "POST /quiz", "POST", "/quiz", form={"index": str(index), "answer": rng.choice(WORDS)}
+        )
+
+
+def dashboard_session(client: Client, rng: random.Random, args) -> None:
+    """Poll the dashboard like an open tab, revalidating with the ETag."""
+    etag = None
+    for _ in range(args.polls):
+        headers = {"If-None-Match": etag} if etag else {}
+        status, _, resp_headers = client.request("GET /dashboard", "GET", "/dashboard", headers=headers)
+        etag = resp_headers.get("ETag") or etag
+
+
+def clip_session(client: Client, rng: random.Random, args) -> None:
+    for _ in range(3):
+        start = rng.uniform(0, 3600)
+        client.request(
+            "POST /clip",
+            "POST",
+            "/clip",
+            json_body={"video": "lecture.mp4", "start": round(start, 1), "end": round(start + rng.uniform(5, 60), 1)},
+        )
+
+
+def upload_session(client: Client, rng: random.Random, args) -> None:
+    """Upload a synthetic Markdown document into a fresh project."""
+    name = f"notes_{uuid.uuid4().hex[:8]}.md"
+    client.request(
+        "POST /upload",
+        "POST",
+        "/upload",
+        form={"project": f"load_{uuid.uuid4().hex[:8]}"},
+        file=(name, synthetic_document(rng)),
+    )
+
+
+SESSIONS: Dict[str, Callable] = {
+    "review": review_session,
+    "quiz": quiz_session,
+    "dashboard": dashboard_session,
+    "clip": clip_session,
+    "upload": upload_session,
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SESSIONS:
+            raise ValueError(f"Unknown session type: {name}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("Session mix needs at least one positive weight")
+    return mix
+
+
+# -- setup and reporting -------------------------------------------------------
+
+
+def prepare_app(workdir: Path, seed_cards: int = SEED_CARDS):
+    """Import the app with every data path redirected into *workdir*."""
+    sys.path.insert(0, str(BASE_DIR / "ui"))
+    import app as webapp
+
+    for name in dir(webapp):
+        value = getattr(webapp, name)
+        if name.endswith("_PATH") and isinstance(value, Path) and name != "CURRICULUM_PATH":
+            setattr(webapp, name, workdir / value.name)
+    webapp.DATA_DIR = workdir / "data"
+    webapp.UPLOAD_DIR = webapp.DATA_DIR / "uploads"
+    webapp.RELATED_INDEX_PATH = webapp.DATA_DIR / "related_index.json"
+    webapp.RELATED_INDEX_DIR = webapp.DATA_DIR / "related_index"
+    webapp.CLIPS_DIR = workdir / "video_clips"
+    # The scheduler was built at import time with the checkout's state file.
+    webapp.focus_sessions = webapp.focus_scheduler.FocusScheduler(
+        webapp.FOCUS_SESSIONS_PATH, webapp._log_focus_session
+    )
+    webapp.focus_sessions_owner = None
+    webapp.UPLOAD_DIR.mkdir(parents=True)
+    # Ingestors write to the relative data/projects directory.
+    os.chdir(workdir)
+
+    cards = [
+        {"question": f"What does {WORDS[n % len(WORDS)]} {n} do?", "answer": f"It is card {n}."}
+        for n in range(seed_cards)
+    ]
+    webapp.FLASHCARDS_PATH.write_text(json.dumps(cards), encoding="utf-8")
+    today = date.today().isoformat()
+    queue = [dict(card, due_date=today) for card in cards]
+    webapp.QUEUE_PATH.write_text(json.dumps(queue), encoding="utf-8")
+    return webapp.app
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def report(recorder: Recorder, elapsed: float, sessions: int) -> str:
+    total = sum(len(v) for v in recorder.samples.values())
+    errors = sum(recorder.errors.values())
+    lines = [
+        f"{sessions} sessions, {total} requests in {elapsed:.1f}s: "
+        f"{total / elapsed:.1f} req/s, {sessions / elapsed:.2f} sessions/s, "
+        f"{errors} errors ({errors / max(total, 1):.1%})",
+        f"{'route':<26}{'count':>7}{'err%':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}",
+    ]
+    for route in sorted(recorder.samples):
+        values = sorted(recorder.samples[route])
+        ms = [percentile(values, p) * 1000 for p in (50, 95, 99)] + [values[-1] * 1000]
+        err = recorder.errors[route] / len(values)
+        lines.append(
+            f"{route:<26}{len(values):>7}{err:>7.1%}" + "".join(f"{v:>9.1f}" for v in ms)
+        )
+    return "\n".join(lines)
+
+
+def run(client_factory: Callable[[], Client], recorder: Recorder, mix: Dict[str, float], args) -> Tuple[float, int]:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    deadline = time.perf_counter() + args.duration
+    counts = [0] * args.users
+
+    def user(n: int) -> None:
+        rng = random.Random(args.seed + n)
+        client = client_factory()
+        while time.perf_counter() < deadline:
+            SESSIONS[rng.choices(names, weights)[0]](client, rng, args)
+            counts[n] += 1
+
+    threads = [threading.Thread(target=user, args=(n,), daemon=True) for n in range(args.users)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, sum(counts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the web app with scripted sessions")
+    parser.add_argument("--users", type=int, default=4, help="Concurrent simulated learners")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Session weights, e.g. review=4,quiz=1")
+    parser.add_argument("--cards", type=int, default=10, help="Cards per review or quiz session")
+    parser.add_argument("--polls", type=int, default=5, help="Dashboard requests per session")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--url", help="Base URL of a server on localhost instead of in-process")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    recorder = Recorder()
+    if args.url:
+        if urlsplit(args.url).hostname not in LOCAL_HOSTS:
+            parser.error("--url must point at localhost")
+        elapsed, sessions = run(lambda: Client(recorder, url=args.url), recorder, mix, args)
+    else:
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory(prefix="autodidact-load-") as tmp:
+            app = prepare_app(Path(tmp))
+            app.logger.disabled = True
+            try:
+                elapsed, sessions = run(lambda: Client(recorder, app=app), recorder, mix, args)
+            finally:
+                os.chdir(cwd)
+    print(report(recorder, elapsed, sessions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Byte-offset index of the sections and chunks of an ingested Markdown file.
+
+Ingestors write ``<stem>.index.json`` next to ``<stem>.md``. It lists every
+section (``# title`` block) and fixed-size, overlapping token windows over
+each section body, all as byte offsets into the Markdown file, so a consumer
+can fetch any chunk with a single ``pread`` instead of re-reading and
+re-splitting the whole document. Tokens are whitespace-separated words.
+
+Ingestors store the Markdown uncompressed (``MARKDOWN_CODEC``) whatever
+codec ``utils.storage`` is configured with, since a compressed stream can
+only reach an offset by decompressing everything before it. Offsets refer
+to the uncompressed text, and Markdown stored compressed by older versions
+is still read, by a forward scan of the decompressed stream.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils import storage
+
+# Codec for indexed Markdown; chunk reads are a pread at the chunk offset.
+MARKDOWN_CODEC = "none"
+WINDOW_TOKENS = 200
+OVERLAP_TOKENS = 40
+TOKEN_RE = re.compile(rb"\S+")
+HEADER_RE = re.compile(rb"^# ([^\n]*)\n\n", re.MULTILINE)
+
+
+def index_path(md_path: Path) -> Path:
+    return md_path.with_suffix(".index.json")
+
+
+def chunk_spans(
+    body, window: int = WINDOW_TOKENS, overlap: int = OVERLAP_TOKENS
+) -> List[Tuple[int, int, int]]:
+    """Return ``(start, end, tokens)`` windows over *body*, relative to it."""
+    if overlap >= window:
+        raise ValueError("overlap must be smaller than window")
+    words = [m.span() for m in TOKEN_RE.finditer(body)]
+    spans = []
+    step = window - overlap
+    for first in range(0, len(words), step):
+        last = min(first + window, len(words)) - 1
+        spans.append((words[first][0], words[last][1], last - first + 1))
+        if last == len(words) - 1:
+            break
+    return spans
+
+
+class IndexBuilder:
+    """Collect sections as they are written and produce the index dict."""
+
+    def __init__(self, window: int = WINDOW_TOKENS, overlap: int = OVERLAP_TOKENS) -> None:
+        self.window = window
+        self.overlap = overlap
+        self.sections: List[Dict] = []
+        self.chunks: List[Dict] = []
+
+    def add_section(
+        self,
+        title: str,
+        offset: int,
+        body,
+        digest: Optional[str] = None,
+        spans: Optional[List[Tuple[int, int, int]]] = None,
+    ) -> None:
+        """Add a section whose *body* starts at byte *offset* of the file.
+
+        *digest* and *spans* may be passed to reuse an unchanged section's
+        chunking instead of re-tokenizing it.
+        """
+        if digest is None:
+            digest = hashlib.sha1(body).hexdigest()
+        if spans is None:
+            spans = chunk_spans(body, self.window, self.overlap)
+        section_id = len(self.sections)
+        chunk_ids = []
+        for start, end, tokens in spans:
+            chunk_ids.append(len(self.chunks))
+            self.chunks.append(
+                {
+                    "id": len(self.chunks),
+                    "section": section_id,
+                    "offset": offset + start,
+                    "length": end - start,
+                    "tokens": tokens,
+                }
+            )
+        self.sections.append(
+            {
+                "id": section_id,
+                "title": title,
+                "offset": offset,
+                "length": len(body),
+                "sha1": digest,
+                "chunks": chunk_ids,
+            }
+        )
+
+    def to_dict(self, source: str, size: int) -> Dict:
+        return {
+            "source": source,
+            "size": size,
+            "window": self.window,
+            "overlap": self.overlap,
+            "sections": self.sections,
+            "chunks": self.chunks,
+        }
+
+
+def write_index(index: Dict, md_path: Path) -> Path:
+    """Write the sidecar for *md_path*, which must already be stored."""
+    index["stored_size"] = storage.stored_size(md_path)
+    path = index_path(md_path)
+    path.write_text(json.dumps(index), encoding="utf-8")
+    return path
+
+
+def load_index(md_path: Path) -> Optional[Dict]:
+    path = index_path(md_path)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return None
+
+
+def _scan_sections(data: bytes) -> List[Tuple[str, int, int]]:
+    """Find ``(title, body_start, body_end)`` from ``# title`` headers.
+
+    Used when no index was recorded at write time; a body line that itself
+    starts with ``# `` after a blank line is taken as a new section.
+    """
+    headers = list(HEADER_RE.finditer(data))
+    found = []
+    for n, match in enumerate(headers):
+        end = headers[n + 1].start() if n + 1 < len(headers) else len(data)
+        body_end = end
+        while body_end > match.end() and data[body_end - 1 : body_end] == b"\n":
+            body_end -= 1
+        found.append((match.group(1).decode("utf-8", "replace"), match.end(), body_end))
+    return found
+
+
+def build_index(
+    md_path: Path,
+    window: int = WINDOW_TOKENS,
+    overlap: int = OVERLAP_TOKENS,
+    previous: Optional[Dict] = None,
+) -> Dict:
+    """Index *md_path* by scanning it, reusing chunks from *previous*.
+
+    Sections whose content hash matches a section of *previous* (built with
+    the same window settings) keep their chunk boundaries, shifted to their
+    new offset; only new or edited sections are re-tokenized.
+    """
+    data = storage.read_bytes(md_path)
+    reusable: Dict[str, List[Tuple[int, int, int]]] = {}
+    if previous and previous.get("window") == window and previous.get("overlap") == overlap:
+        chunks = previous["chunks"]
+        for sec in previous["sections"]:
+            reusable[sec["sha1"]] = [
+                (
+                    chunks[c]["offset"] - sec["offset"],
+                    chunks[c]["offset"] - sec["offset"] + chunks[c]["length"],
+                    chunks[c]["tokens"],
+                )
+                for c in sec["chunks"]
+            ]
+
+    builder = IndexBuilder(window, overlap)
+    for title, start, end in _scan_sections(data):
+        body = memoryview(data)[start:end]
+        digest = hashlib.sha1(body).hexdigest()
+        builder.add_section(title, start, body, digest, reusable.get(digest))
+    index = builder.to_dict(md_path.name, len(data))
+    index["stored_size"] = storage.stored_size(md_path)
+    return index
+
+
+def update_index(md_path: Path) -> Dict:
+    """Re-index *md_path* after an edit, re-chunking only changed sections."""
+    previous = load_index(md_path)
+    kwargs = {}
+    if previous:
+        kwargs = {"window": previous["window"], "overlap": previous["overlap"]}
+    index = build_index(md_path, previous=previous, **kwargs)
+    write_index(index, md_path)
+    return index
+
+
+def ensure_index(md_path: Path) -> Dict:
+    """Return the stored index for *md_path*, building it if missing or stale."""
+    index = load_index(md_path)
+    # Indexes written before compression only recorded the text size.
+    if index is None or index.get("stored_size", index.get("size")) != storage.stored_size(md_path):
+        index = update_index(md_path)
+    return index
+
+
+def _read_ranges(md_path: Path, ranges: Iterable[Tuple[int, int]]) -> Iterator[bytes]:
+    """Yield ``length`` bytes at each ``(offset, length)`` of the text.
+
+    Plain files are read with ``pread``. Compressed ones are decompressed
+    front to back once, keeping only the bytes from the current range on,
+    so ranges should come in increasing offset order (overlaps are fine).
+    """
+    stored = storage.resolve(md_path)
+    if storage.codec_of(stored) == "none":
+        fd = os.open(stored, os.O_RDONLY)
+        try:
+            for offset, length in ranges:
+                yield os.pread(fd, length, offset)
+        finally:
+            os.close(fd)
+        return
+
+    stream = storage.open_read(md_path)
+    try:
+        buf, buf_start = b"", 0
+        for offset, length in ranges:
+            if offset < buf_start or offset > buf_start + len(buf):
+                stream.seek(offset)
+                buf, buf_start = b"", offset
+            buf, buf_start = buf[offset - buf_start :], offset
+            while len(buf) < length:
+                block = stream.read(max(storage.STREAM_BLOCK, length - len(buf)))
+                if not block:
+                    break
+                buf += block
+            yield buf[:length]
+    finally:
+        stream.close()
+
+
+def read_chunk(md_path: Path, index: Dict, chunk_id: int) -> str:
+    """Return the text of one chunk with a single positioned read."""
+    chunk = index["chunks"][chunk_id]
+    data = next(_read_ranges(md_path, [(chunk["offset"], chunk["length"])]))
+    return data.decode("utf-8", "replace")
+
+
+def read_section(md_path: Path, index: Dict, section_id: int) -> str:
+    section = index["sections"][section_id]
+    data = next(_read_ranges(md_path, [(section["offset"], section["length"])]))
+    return data.decode("utf-8", "replace")
+
+
+def iter_sections(md_path: Path, index: Optional[Dict] = None) -> Iterator[Tuple[Dict, str]]:
+    """Yield ``(section, text)`` in document order with one pass over the file."""
+    if index is None:
+        index = ensure_index(md_path)
+    sections = index["sections"]
+    ranges = ((sec["offset"], sec["length"]) for sec in sections)
+    for section, data in zip(sections, _read_ranges(md_path, ranges)):
+        yield section, data.decode("utf-8", "replace")
+
+
+def iter_chunks(md_path: Path, index: Optional[Dict] = None) -> Iterator[str]:
+    """Yield chunk texts in document order, reading each one lazily."""
+    if index is None:
+        index = ensure_index(md_path)
+    ranges = ((chunk["offset"], chunk["length"]) for chunk in index["chunks"])
+    for data in _read_ranges(md_path, ranges):
+        yield data.decode("utf-8", "replace")
+
+
+def map_chunks(
+    func: Callable[[str], object],
+    md_path: Path,
+    index: Optional[Dict] = None,
+    workers: int = 4,
+) -> List:
+    """Apply *func* to every chunk in parallel and return results in order."""
+    if index is None:
+        index = ensure_index(md_path)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if storage.codec_of(storage.resolve(md_path)) != "none":
+            # Random access would decompress from the start for every chunk.
+            return list(pool.map(func, iter_chunks(md_path, index)))
+        ids = range(len(index["chunks"]))
+        return list(pool.map(lambda i: func(read_chunk(md_path, index, i)), ids))
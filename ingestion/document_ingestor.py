@@ -1,16 +1,41 @@
 from __future__ import annotations
 import sys
+import codecs
+import posixpath
+import re
+import zipfile
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Tuple
+from urllib.parse import unquote
 import uuid
 
-import fitz  # PyMuPDF
-from ebooklib import epub
-import ebooklib
-from lxml import html
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ingestion import chunk_index
+from utils import storage
+
+# PyMuPDF, ebooklib and lxml are imported inside the functions that need
+# them so importing this module (or ingesting one format) stays cheap.
+
+EPUB_READ_SIZE = 64 * 1024
+EPUB_DOCUMENT_TYPES = {"application/xhtml+xml", "text/html"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = HEADING_TAGS | {
+    "p", "div", "li", "br", "tr", "blockquote", "pre", "section", "article",
+}
+SKIPPED_TAGS = {"head", "title", "script", "style"}
+# EPUB content documents are UTF-8 unless they declare otherwise.
+DEFAULT_ENCODING = "utf-8"
+DECLARED_ENCODING_RE = re.compile(
+    rb"""<\?xml[^>]*?encoding=["']([A-Za-z0-9._-]+)["']|<meta[^>]*?charset=["']?([A-Za-z0-9._-]+)""",
+    re.IGNORECASE,
+)
+BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
 
 
 def extract_pdf(path: Path) -> List[Dict[str, str]]:
+    import fitz  # PyMuPDF
+
     doc = fitz.open(path)
     sections = []
     for page_num in range(len(doc)):
@@ -21,6 +46,10 @@ def extract_pdf(path: Path) -> List[Dict[str, str]]:
 
 
 def extract_epub(path: Path) -> List[Dict[str, str]]:
+    import ebooklib
+    from ebooklib import epub
+    from lxml import html
+
     book = epub.read_epub(str(path))
     sections = []
     for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
@@ -31,13 +60,163 @@ def extract_epub(path: Path) -> List[Dict[str, str]]:
     return sections
 
 
-def write_sections(sections: List[Dict[str, str]], output_path: Path) -> None:
-    with output_path.open("w", encoding="utf-8") as f:
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower() if isinstance(tag, str) else ""
+
+
+class _TextEvents:
+    """lxml parser target turning markup into ``(kind, text)`` events.
+
+    ``kind`` is ``"heading"`` for text inside ``h1``-``h6`` and ``"text"``
+    otherwise. No element tree is built, so memory only grows with the
+    events not yet drained by the caller.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, str]] = []
+        self._skip = 0
+        self._heading = 0
+
+    def start(self, tag, attrib) -> None:
+        name = _local_name(tag)
+        if name in SKIPPED_TAGS:
+            self._skip += 1
+        elif name in HEADING_TAGS:
+            self._heading += 1
+
+    def end(self, tag) -> None:
+        name = _local_name(tag)
+        if name in SKIPPED_TAGS:
+            self._skip = max(self._skip - 1, 0)
+            return
+        if name in HEADING_TAGS:
+            self._heading = max(self._heading - 1, 0)
+        if name in BLOCK_TAGS and not self._skip:
+            self.events.append(("text", "\n"))
+
+    def data(self, data: str) -> None:
+        if not self._skip:
+            self.events.append(("heading" if self._heading else "text", data))
+
+    def close(self) -> None:
+        return None
+
+
+def _sniff_encoding(head: bytes) -> str:
+    """Return the encoding of a document starting with *head*.
+
+    A byte order mark wins, then an XML declaration or ``<meta charset>``;
+    otherwise the document is taken to be UTF-8 rather than left to the
+    HTML parser, which would fall back to Latin-1.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = DECLARED_ENCODING_RE.search(head)
+    if match:
+        declared = (match.group(1) or match.group(2)).decode("ascii")
+        try:
+            return codecs.lookup(declared).name
+        except LookupError:
+            pass
+    return DEFAULT_ENCODING
+
+
+def _iter_markup_events(stream) -> Iterator[Tuple[str, str]]:
+    """Feed *stream* to an incremental HTML parser and yield text events."""
+    from lxml import etree
+
+    target = _TextEvents()
+    block = stream.read(EPUB_READ_SIZE)
+    parser = etree.HTMLParser(target=target, encoding=_sniff_encoding(block[:1024]))
+    while block:
+        parser.feed(block)
+        yield from target.events
+        target.events.clear()
+        block = stream.read(EPUB_READ_SIZE)
+    parser.close()
+    yield from target.events
+    target.events.clear()
+
+
+def _epub_spine(zf: zipfile.ZipFile) -> Tuple[str, List[str]]:
+    """Return the OPF directory and the spine documents of an open EPUB."""
+    from lxml import etree
+
+    container = etree.fromstring(zf.read("META-INF/container.xml"))
+    rootfiles = container.xpath("//*[local-name()='rootfile']/@full-path")
+    if not rootfiles:
+        raise ValueError("EPUB container does not declare a package file")
+    opf_path = rootfiles[0]
+    opf_dir = posixpath.dirname(opf_path)
+    package = etree.fromstring(zf.read(opf_path))
+
+    manifest: Dict[str, Tuple[str, str]] = {}
+    for item in package.xpath("//*[local-name()='manifest']/*[local-name()='item']"):
+        manifest[item.get("id")] = (item.get("href", ""), item.get("media-type", ""))
+
+    spine = []
+    for ref in package.xpath("//*[local-name()='spine']/*[local-name()='itemref']"):
+        href, media_type = manifest.get(ref.get("idref"), ("", ""))
+        if href and media_type in EPUB_DOCUMENT_TYPES:
+            spine.append(unquote(href))
+    return opf_dir, spine
+
+
+def iter_epub_sections(path: Path) -> Iterator[Dict[str, str]]:
+    """Yield EPUB sections in spine order without loading the whole book.
+
+    The archive is opened through its zip central directory and each spine
+    document is decompressed and parsed incrementally, so peak memory is
+    bounded by the largest single section rather than the book. The first
+    heading of a document becomes its title, falling back to the file name.
+    """
+    with zipfile.ZipFile(path) as zf:
+        opf_dir, spine = _epub_spine(zf)
+        for href in spine:
+            member = posixpath.normpath(posixpath.join(opf_dir, href))
+            heading: List[str] = []
+            heading_done = False
+            parts: List[str] = []
+            with zf.open(member) as stream:
+                for kind, text in _iter_markup_events(stream):
+                    if not heading_done:
+                        if kind == "heading":
+                            heading.append(text)
+                        elif heading:
+                            heading_done = True
+                    parts.append(text)
+            title = " ".join("".join(heading).split())
+            yield {"title": title or href, "text": "".join(parts).strip()}
+
+
+def write_sections(
+    sections: Iterable[Dict[str, str]], output_path: Path, index: bool = True
+) -> None:
+    """Write *sections* as Markdown and, if *index*, its chunk index sidecar.
+
+    The Markdown is stored uncompressed (``chunk_index.MARKDOWN_CODEC``) so
+    chunks can be read at their offsets.
+    """
+    builder = chunk_index.IndexBuilder()
+    offset = 0
+    with storage.open_write(output_path, codec=chunk_index.MARKDOWN_CODEC) as f:
         for sec in sections:
-            f.write(f"# {sec['title']}\n\n{sec['text']}\n\n")
+            header = f"# {sec['title']}\n\n".encode("utf-8")
+            body = sec["text"].encode("utf-8")
+            f.write(header)
+            f.write(body)
+            f.write(b"\n\n")
+            if index:
+                builder.add_section(sec["title"], offset + len(header), body)
+            offset += len(header) + len(body) + 2
+    if index:
+        chunk_index.write_index(builder.to_dict(output_path.name, offset), output_path)
 
 
-def ingest_document(file_path: str, project: str | None = None) -> Path:
+def ingest_document(
+    file_path: str, project: str | None = None, streaming: bool = True
+) -> Path:
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
@@ -52,7 +231,7 @@ def ingest_document(file_path: str, project: str | None = None) -> Path:
     if path.suffix.lower() == ".pdf":
         sections = extract_pdf(path)
     elif path.suffix.lower() == ".epub":
-        sections = extract_epub(path)
+        sections = iter_epub_sections(path) if streaming else extract_epub(path)
     else:
         raise ValueError("Unsupported file type. Use PDF or EPUB.")
 
@@ -66,7 +245,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Ingest a document file")
     parser.add_argument("file", help="PDF or EPUB to ingest")
     parser.add_argument("--project", help="Project ID", default=None)
+    parser.add_argument(
+        "--no-streaming",
+        action="store_true",
+        help="Load EPUBs with ebooklib instead of streaming the archive",
+    )
     args = parser.parse_args()
 
-    result = ingest_document(args.file, args.project)
+    result = ingest_document(args.file, args.project, streaming=not args.no_streaming)
     print(f"Written output to {result}")
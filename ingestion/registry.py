@@ -0,0 +1,69 @@
+"""Registry of ingestors keyed by file extension.
+
+Ingestors are recorded as ``"module:function"`` strings and imported on
+first use, so heavy parsing libraries (PyMuPDF, ebooklib, lxml) are only
+loaded by processes that actually ingest that format. ``kind`` tells the
+caller what the ingestor returns: ``"document"`` ingestors return the path
+of the written Markdown file, ``"video"`` ingestors return the transcript
+and chunk paths.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Callable, Dict, List, Tuple, Union
+
+_registry: Dict[str, Tuple[Union[str, Callable], str]] = {}
+_loaded: Dict[str, Callable] = {}
+_lock = threading.Lock()
+
+
+def _normalize(ext: str) -> str:
+    ext = ext.lower()
+    return ext if ext.startswith(".") else f".{ext}"
+
+
+def register(ext: str, target: Union[str, Callable], kind: str = "document") -> None:
+    """Register *target* (a callable or ``"module:function"``) for *ext*."""
+    ext = _normalize(ext)
+    with _lock:
+        _registry[ext] = (target, kind)
+        _loaded.pop(ext, None)
+
+
+def supported_extensions() -> List[str]:
+    return sorted(_registry)
+
+
+def is_supported(ext: str) -> bool:
+    return _normalize(ext) in _registry
+
+
+def get_ingestor(ext: str) -> Tuple[Callable, str]:
+    """Return ``(ingestor, kind)`` for *ext*, importing it if needed.
+
+    Raises ``ValueError`` for unregistered extensions.
+    """
+    ext = _normalize(ext)
+    try:
+        target, kind = _registry[ext]
+    except KeyError:
+        raise ValueError(f"Unsupported file type: {ext}") from None
+    func = _loaded.get(ext)
+    if func is None:
+        if isinstance(target, str):
+            module_name, _, attr = target.partition(":")
+            func = getattr(importlib.import_module(module_name), attr)
+        else:
+            func = target
+        with _lock:
+            _loaded[ext] = func
+    return func, kind
+
+
+register(".pdf", "ingestion.document_ingestor:ingest_document")
+register(".epub", "ingestion.document_ingestor:ingest_document")
+register(".txt", "ingestion.text_ingestor:ingest_text")
+register(".md", "ingestion.text_ingestor:ingest_text")
+register(".mp4", "ingestion.video_ingestor:ingest_video", kind="video")
@@ -0,0 +1,181 @@
+"""Ingest large plain-text and Markdown files through a memory map.
+
+The source is never decoded into one Python string: Markdown headings are
+located with a regex over the mapped bytes, long stretches are cut at blank
+lines, and each section is handed out as a ``memoryview`` slice of the map
+and written to ``data/projects/<project>/<stem>.md`` directly from it.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import sys
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ingestion import chunk_index
+from utils import storage
+
+MAX_SECTION_BYTES = 64 * 1024
+# An ATX heading or a code fence line; headings inside fences are ignored.
+BLOCK_RE = re.compile(
+    rb"^(?:[ ]{0,3}(?P<fence>`{3,}|~{3,})[^\r\n]*|#{1,6}[ \t]+(?P<title>[^\r\n]*))",
+    re.MULTILINE,
+)
+WHITESPACE = b" \t\r\n"
+
+Span = Tuple[str, int, int]
+
+
+def _trim(buf, start: int, end: int) -> Tuple[int, int]:
+    while start < end and buf[start] in WHITESPACE:
+        start += 1
+    while end > start and buf[end - 1] in WHITESPACE:
+        end -= 1
+    return start, end
+
+
+def _split_long(buf, title: str, start: int, end: int, max_bytes: int) -> Iterator[Span]:
+    """Cut ``buf[start:end]`` into pieces of at most *max_bytes*.
+
+    Cuts prefer the last blank line inside the window, then the last line
+    break, then the last space, and fall back to the nearest UTF-8
+    character boundary.
+    """
+    part = 1
+    while start < end:
+        stop = end
+        if end - start > max_bytes:
+            limit = start + max_bytes
+            for sep in (b"\n\n", b"\n", b" "):
+                cut = buf.rfind(sep, start, limit)
+                if cut > start:
+                    stop = cut + 1
+                    break
+            else:
+                stop = limit
+                while stop > start + 1 and buf[stop] & 0xC0 == 0x80:
+                    stop -= 1
+        lo, hi = _trim(buf, start, stop)
+        if hi > lo:
+            yield (title if part == 1 else f"{title} ({part})", lo, hi)
+            part += 1
+        start = stop
+
+
+def section_spans(buf, markdown: bool, max_bytes: int = MAX_SECTION_BYTES) -> List[Span]:
+    """Return ``(title, start, end)`` byte spans of the sections in *buf*.
+
+    Markdown is split at ATX headings outside fenced code blocks (the
+    heading line becomes the title, text before the first heading is kept
+    as an untitled preamble); plain
+    text is split only at blank lines. Either way no section body exceeds
+    *max_bytes*.
+    """
+    spans: List[Span] = []
+    if markdown:
+        title, pos = "Preamble", 0
+        fence = b""
+        for match in BLOCK_RE.finditer(buf):
+            marker = match.group("fence")
+            if marker is not None:
+                if not fence:
+                    fence = marker
+                elif marker[:1] == fence[:1] and len(marker) >= len(fence):
+                    fence = b""
+                continue
+            if fence:
+                continue
+            spans.extend(_split_long(buf, title, pos, match.start(), max_bytes))
+            title = match.group("title").strip().decode("utf-8", "replace") or "Untitled"
+            pos = match.end()
+        spans.extend(_split_long(buf, title, pos, len(buf), max_bytes))
+    else:
+        for n, (_, start, end) in enumerate(_split_long(buf, "", 0, len(buf), max_bytes), start=1):
+            spans.append((f"Section {n}", start, end))
+    return spans
+
+
+@contextmanager
+def mapped(path: Path):
+    """Map *path* read-only; yields ``b""`` for empty files."""
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            try:
+                mm.close()
+            except BufferError:
+                # A caller still holds a memoryview; the map is released
+                # once that view is garbage collected.
+                pass
+
+
+def iter_section_views(
+    path: Path, max_bytes: int = MAX_SECTION_BYTES
+) -> Iterator[Tuple[str, memoryview]]:
+    """Yield ``(title, view)`` for each section without copying the text.
+
+    Views point into the memory map and are only valid while the generator
+    is alive; call ``bytes(view)`` or ``str(view, "utf-8")`` to keep one.
+    """
+    markdown = path.suffix.lower() in {".md", ".markdown"}
+    with mapped(path) as buf:
+        view = memoryview(buf)
+        try:
+            for title, start, end in section_spans(buf, markdown, max_bytes):
+                yield title, view[start:end]
+        finally:
+            view.release()
+
+
+def ingest_text(file_path: str, project: str | None = None) -> Path:
+    """Split a ``.txt``/``.md`` file into sections written as Markdown."""
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    base_dir = Path("data") / "projects"
+    if project is None:
+        project = uuid.uuid4().hex
+    output_dir = base_dir / project
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{path.stem}.md"
+
+    # The storage layer writes beside the target and renames, so ingesting a
+    # file in place does not truncate the source while it is still mapped.
+    builder = chunk_index.IndexBuilder()
+    offset = 0
+    with storage.open_write(output_path, codec=chunk_index.MARKDOWN_CODEC) as out:
+        for title, view in iter_section_views(path):
+            header = f"# {title}\n\n".encode("utf-8")
+            out.write(header)
+            out.write(view)
+            out.write(b"\n\n")
+            builder.add_section(title, offset + len(header), view)
+            offset += len(header) + len(view) + 2
+            view.release()
+    chunk_index.write_index(builder.to_dict(output_path.name, offset), output_path)
+    return output_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest a large text or Markdown file")
+    parser.add_argument("file", help="TXT or MD file to ingest")
+    parser.add_argument("--project", help="Project ID", default=None)
+    args = parser.parse_args()
+
+    result = ingest_text(args.file, args.project)
+    print(f"Written output to {result}")
@@ -1,9 +1,12 @@
 from __future__ import annotations
 import sys
-import json
 from pathlib import Path
 import uuid
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils import storage
+
 
 def transcribe(source: str) -> str:
     """Stub for WhisperX transcription."""
@@ -27,10 +30,10 @@ def ingest_video(source: str, project: str | None = None) -> tuple[Path, Path]:
     chunks_path = data_dir / "transcript_chunks.json"
 
     transcript = transcribe(source)
-    transcript_path.write_text(transcript)
+    storage.write_text(transcript_path, transcript)
 
     chunks = create_chunks(transcript)
-    chunks_path.write_text(json.dumps(chunks, indent=2))
+    storage.write_json(chunks_path, chunks)
 
     return transcript_path, chunks_path
 
@@ -0,0 +1,123 @@
+"""Fuzzy grading of typed quiz answers against a card's answer.
+
+Both texts are normalized (case, accents, punctuation, articles) and then
+compared two ways:
+
+* character similarity, ``1 - distance / longer length``, where the
+  Levenshtein distance is computed with the bit-parallel algorithm of
+  Myers as formulated by Hyyrö, using Python ints as bit vectors: one
+  pass over the text with a handful of word operations per character
+  instead of filling an ``m x n`` table;
+* a token-set ratio, which ignores word order and duplicated words. It is
+  capped by the share of the expected words the answer contains, so a
+  one-word answer cannot match a whole sentence.
+
+The better of the two is the score; ``correct`` at ``CORRECT_AT`` and
+above, ``close`` at ``CLOSE_AT`` and above, otherwise ``incorrect``.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Tuple
+
+CORRECT_AT = 0.85
+CLOSE_AT = 0.6
+ARTICLES = {"a", "an", "the"}
+NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Lower-case, strip accents and punctuation, drop articles."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    words = NON_WORD_RE.sub(" ", text).split()
+    return " ".join(w for w in words if w not in ARTICLES)
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Return the edit distance between *a* and *b* (bit-parallel)."""
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+
+    # One bit per pattern position, set where the character occurs.
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(b):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for ch in a:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def ratio(a: str, b: str) -> float:
+    """Character similarity in ``[0, 1]``."""
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    if a == b:
+        return 1.0
+    return 1.0 - levenshtein(a, b) / longest
+
+
+def token_set_ratio(a: str, b: str) -> float:
+    """Compare the shared words with each side's shared-plus-extra words.
+
+    Scores 1.0 when one side's word set contains the other's, regardless
+    of order.
+    """
+    ta, tb = set(a.split()), set(b.split())
+    common = " ".join(sorted(ta & tb))
+    rest_a = " ".join(sorted(ta - tb))
+    rest_b = " ".join(sorted(tb - ta))
+    full_a = f"{common} {rest_a}".strip()
+    full_b = f"{common} {rest_b}".strip()
+    return max(ratio(common, full_a), ratio(common, full_b), ratio(full_a, full_b))
+
+
+def grade(answer: str, expected: str) -> Dict:
+    """Return ``{"score", "verdict"}`` for *answer* against *expected*."""
+    given, target = normalize(answer), normalize(expected)
+    if not given:
+        return {"score": 0.0, "verdict": "incorrect"}
+    if given == target:
+        return {"score": 1.0, "verdict": "correct"}
+
+    score = ratio(given, target)
+    if score < CORRECT_AT:
+        target_words = set(target.split())
+        if target_words:
+            recall = len(target_words & set(given.split())) / len(target_words)
+            score = max(score, min(token_set_ratio(given, target), recall))
+
+    if score >= CORRECT_AT:
+        verdict = "correct"
+    elif score >= CLOSE_AT:
+        verdict = "close"
+    else:
+        verdict = "incorrect"
+    return {"score": round(score, 3), "verdict": verdict}
+
+
+def grade_many(pairs: Iterable[Tuple[str, str]]) -> List[Dict]:
+    """Grade ``(answer, expected)`` pairs in order."""
+    return [grade(answer, expected) for answer, expected in pairs]
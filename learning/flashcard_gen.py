@@ -1,19 +1,46 @@
-import json
 import re
+import sys
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, List, Dict, Union
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from utils import storage
 
-def generate_flashcards(text_chunk: str) -> List[Dict[str, str]]:
+
+
+def _first_sentences(passages: Iterable[str], limit: int) -> List[str]:
+    """Collect up to *limit* distinct sentences, reading passages lazily."""
+    sentences: List[str] = []
+    seen = set()
+    for passage in passages:
+        for s in re.split(r'[.!?]', passage):
+            s = s.strip()
+            if s and s not in seen:
+                seen.add(s)
+                sentences.append(s)
+                if len(sentences) == limit:
+                    return sentences
+    return sentences
+
+
+def generate_flashcards(text_chunk: Union[str, Iterable[str]]) -> List[Dict[str, str]]:
     """Stub to generate example flashcards from *text_chunk*.
 
     In a real application this would call an LLM to create question/answer
     pairs. This stub extracts up to five sentences from the input text and
-    uses them to create simple flashcards.
+    uses them to create simple flashcards. *text_chunk* may also be an
+    iterable of passages that each end on a sentence boundary, such as the
+    section texts from ``chunk_index.iter_sections``; only as many passages
+    as needed are consumed and repeated sentences are skipped. Fixed-size
+    token windows (``iter_chunks``) are not suitable: they cut sentences
+    in half.
     """
     # Break the text into sentences
-    sentences = [s.strip() for s in re.split(r'[.!?]', text_chunk) if s.strip()]
+    if isinstance(text_chunk, str):
+        sentences = [s.strip() for s in re.split(r'[.!?]', text_chunk) if s.strip()]
+    else:
+        sentences = _first_sentences(text_chunk, 5)
 
     flashcards: List[Dict[str, str]] = []
     for i, sentence in enumerate(sentences[:5], start=1):
@@ -31,8 +58,7 @@ def generate_flashcards(text_chunk: str) -> List[Dict[str, str]]:
 def generate_flashcards_from_transcript(transcript_file: str | Path, project: str = "default") -> Path:
     """Generate flashcards from a ``.transcript.json`` file and store them for a project."""
 
-    path = Path(transcript_file)
-    data = json.loads(path.read_text())
+    data = storage.read_json(transcript_file)
 
     if isinstance(data, dict):
         chunks = data.get("chunks", [])
@@ -50,9 +76,7 @@ def generate_flashcards_from_transcript(transcript_file: str | Path, project: st
 
     out_dir = Path("data") / "projects" / project
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "flashcards.json"
-    out_path.write_text(json.dumps(cards, indent=2), encoding="utf-8")
-    return out_path
+    return storage.write_json(out_dir / "flashcards.json", cards)
 
 
 def main() -> None:
@@ -73,8 +97,7 @@ def main() -> None:
 
     out_dir = Path("data") / "projects" / args.project
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "flashcards.json"
-    out_path.write_text(json.dumps(cards, indent=2), encoding="utf-8")
+    out_path = storage.write_json(out_dir / "flashcards.json", cards)
     print(f"Wrote {len(cards)} flashcards to {out_path}")
 
 
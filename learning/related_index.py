@@ -0,0 +1,323 @@
+"""TF-IDF "related material" index over cards, sections and transcript chunks.
+
+Items are stored as sparse term-weight vectors with an inverted list per
+term, so adding or removing an item only touches the terms it contains.
+Queries walk the inverted lists of the query's terms rarest first. Once a
+budget of postings has been scanned, the candidates found so far are cut
+to the best few and the remaining (common) terms are only looked up for
+those candidates instead of scanning their long lists. Results are ranked
+by cosine similarity.
+
+Weights are ``1 + log(tf)`` per item and the query side carries the IDF,
+so stored vectors never need reweighting as the collection grows.
+
+:class:`IndexStore` persists the index as one file per project, so
+reindexing a project rewrites only that project's file, and picks up files
+written by other processes on :meth:`IndexStore.refresh`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ingestion import chunk_index
+from utils import storage
+
+TOKEN_RE = re.compile(r"[a-z0-9]{3,}")
+UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+STOPWORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "all", "any", "can", "had", "her",
+    "was", "one", "our", "out", "has", "have", "from", "this", "that", "with", "they",
+    "what", "when", "where", "which", "who", "will", "would", "there", "their", "about",
+    "into", "than", "then", "them", "these", "those", "its", "also", "does", "text", "say",
+}
+# Postings scanned in full per query before the candidate set is frozen,
+# and how many candidates (per requested result) survive the cut.
+POSTINGS_BUDGET = 8000
+CANDIDATES_PER_RESULT = 20
+
+
+def tokenize(text: str) -> Dict[str, float]:
+    counts: Dict[str, int] = {}
+    for term in TOKEN_RE.findall(text.lower()):
+        if term not in STOPWORDS:
+            counts[term] = counts.get(term, 0) + 1
+    return {t: 1.0 + math.log(c) for t, c in counts.items()}
+
+
+class RelatedIndex:
+    """Incremental sparse TF-IDF index with cosine top-k queries."""
+
+    def __init__(self) -> None:
+        self.items: Dict[str, Dict] = {}
+        self.vectors: Dict[str, Dict[str, float]] = {}
+        self.norms: Dict[str, float] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.by_project: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, item_id: str, text: str, **meta) -> None:
+        """Index *text* under *item_id*, replacing any previous version.
+
+        *meta* is stored and returned with query results; ``project`` is
+        used by :meth:`remove_project`.
+        """
+        self.remove(item_id)
+        vector = tokenize(text)
+        if vector:
+            self._insert(item_id, meta, vector)
+
+    def _insert(self, item_id: str, meta: Dict, vector: Dict[str, float]) -> None:
+        self.items[item_id] = meta
+        self.vectors[item_id] = vector
+        self.norms[item_id] = math.sqrt(sum(w * w for w in vector.values()))
+        for term, weight in vector.items():
+            self.postings.setdefault(term, {})[item_id] = weight
+        self.by_project.setdefault(meta.get("project", ""), set()).add(item_id)
+
+    def remove(self, item_id: str) -> bool:
+        vector = self.vectors.pop(item_id, None)
+        if vector is None:
+            return False
+        meta = self.items.pop(item_id)
+        self.norms.pop(item_id)
+        for term in vector:
+            plist = self.postings[term]
+            del plist[item_id]
+            if not plist:
+                del self.postings[term]
+        self.by_project.get(meta.get("project", ""), set()).discard(item_id)
+        return True
+
+    def remove_project(self, project: str) -> int:
+        ids = self.by_project.pop(project, set())
+        for item_id in list(ids):
+            self.remove(item_id)
+        return len(ids)
+
+    def idf(self, term: str) -> float:
+        return math.log((len(self.items) + 1) / (len(self.postings.get(term, ())) + 1)) + 1.0
+
+    def query(
+        self,
+        text: str,
+        k: int = 5,
+        kinds: Optional[Iterable[str]] = None,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[float, str, Dict]]:
+        """Return up to *k* ``(score, item_id, meta)`` most similar to *text*."""
+        terms = [(t, w) for t, w in tokenize(text).items() if t in self.postings]
+        if not terms:
+            return []
+        terms.sort(key=lambda tw: len(self.postings[tw[0]]))
+        query = [(t, w * self.idf(t)) for t, w in terms]
+        qnorm = math.sqrt(sum(w * w for _, w in query))
+
+        kinds = set(kinds) if kinds is not None else None
+        exclude = set(exclude)
+
+        def wanted(item_id: str) -> bool:
+            return item_id not in exclude and (
+                kinds is None or self.items[item_id].get("kind") in kinds
+            )
+
+        scores: Dict[str, float] = {}
+        scanned = 0
+        pos = 0
+        while pos < len(query):
+            term, qw = query[pos]
+            plist = self.postings[term]
+            if scores and scanned + len(plist) > POSTINGS_BUDGET:
+                break
+            scanned += len(plist)
+            for item_id, dw in plist.items():
+                scores[item_id] = scores.get(item_id, 0.0) + qw * dw
+            pos += 1
+
+        candidates = [item_id for item_id in scores if wanted(item_id)]
+        if pos < len(query):
+            keep = k * CANDIDATES_PER_RESULT
+            candidates = heapq.nlargest(
+                keep, candidates, key=lambda i: scores[i] / self.norms[i]
+            )
+            for term, qw in query[pos:]:
+                plist = self.postings[term]
+                for item_id in candidates:
+                    dw = plist.get(item_id)
+                    if dw is not None:
+                        scores[item_id] += qw * dw
+
+        ranked = heapq.nlargest(
+            k, ((scores[i] / (qnorm * self.norms[i]), i) for i in candidates)
+        )
+        return [(round(score, 4), item_id, self.items[item_id]) for score, item_id in ranked]
+
+    def snapshot(self, project: Optional[str] = None) -> Dict[str, Dict]:
+        """Return the saved form of the index, or of one *project*'s items.
+
+        Cheap enough to take under a lock: items are replaced rather than
+        modified in place, so the snapshot stays consistent while the index
+        changes and can be written later.
+        """
+        ids = self.items if project is None else self.by_project.get(project, ())
+        return {
+            item_id: {"meta": self.items[item_id], "terms": self.vectors[item_id]}
+            for item_id in ids
+        }
+
+    def load_snapshot(self, data: Dict[str, Dict]) -> None:
+        for item_id, entry in data.items():
+            self.remove(item_id)
+            self._insert(item_id, entry["meta"], entry["terms"])
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "RelatedIndex":
+        index = cls()
+        if not path.exists():
+            return index
+        try:
+            data = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            return index
+        index.load_snapshot(data)
+        return index
+
+
+class IndexStore:
+    """A :class:`RelatedIndex` kept as one JSON file per project under *root*.
+
+    Not thread-safe except for :meth:`write`, which only touches the file;
+    callers serialize everything else.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.index = RelatedIndex()
+        # file name -> (project, mtime_ns, size) as last loaded
+        self._loaded: Dict[str, Tuple[str, int, int]] = {}
+
+    def _path(self, project: str) -> Path:
+        digest = hashlib.sha1(project.encode("utf-8")).hexdigest()[:8]
+        return self.root / f"{UNSAFE_RE.sub('_', project)[:80]}-{digest}.json"
+
+    def refresh(self) -> int:
+        """Reload project files that changed on disk; return how many did."""
+        seen = set()
+        changed = 0
+        for path in self.root.glob("*.json") if self.root.exists() else ():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            seen.add(path.name)
+            loaded = self._loaded.get(path.name)
+            if loaded is not None and loaded[1:] == (st.st_mtime_ns, st.st_size):
+                continue
+            try:
+                data = json.loads(path.read_text())
+                project, items = data["project"], data["items"]
+                RelatedIndex().load_snapshot(items)
+            except (OSError, json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                continue
+            self.index.remove_project(project)
+            self.index.load_snapshot(items)
+            self._loaded[path.name] = (project, st.st_mtime_ns, st.st_size)
+            changed += 1
+        for name in set(self._loaded) - seen:
+            self.index.remove_project(self._loaded.pop(name)[0])
+            changed += 1
+        return changed
+
+    def write(self, project: str, data: Dict[str, Dict]) -> Path:
+        """Write *project*'s snapshot (see :meth:`RelatedIndex.snapshot`)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(project)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"project": project, "items": data}), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def import_legacy(self, legacy_path: Path) -> int:
+        """Split a whole-index ``related_index.json`` into project files.
+
+        Returns the number of items read; the file is renamed to
+        ``<name>.imported`` so this happens once.
+        """
+        if not legacy_path.exists():
+            return 0
+        legacy = RelatedIndex.load(legacy_path)
+        for project in list(legacy.by_project):
+            self.write(project, legacy.snapshot(project))
+        os.replace(legacy_path, legacy_path.with_name(legacy_path.name + ".imported"))
+        return len(legacy)
+
+
+def index_project(index: RelatedIndex, project: str, project_dir: Path) -> int:
+    """(Re)index the flashcards, document sections and transcript chunks
+    stored under *project_dir*. Returns the number of items added.
+    """
+    index.remove_project(project)
+    before = len(index)
+
+    cards_path = project_dir / "flashcards.json"
+    if storage.exists(cards_path):
+        try:
+            cards = storage.read_json(cards_path)
+        except json.JSONDecodeError:
+            cards = []
+        for n, card in enumerate(cards):
+            index.add(
+                f"card:{project}:{n}",
+                f"{card.get('question', '')} {card.get('answer', '')}",
+                kind="card",
+                project=project,
+                label=card.get("question", ""),
+            )
+
+    for md_path in storage.glob(project_dir, "*.md"):
+        for section, text in chunk_index.iter_sections(md_path):
+            index.add(
+                f"section:{project}:{md_path.stem}:{section['id']}",
+                f"{section['title']} {text}",
+                kind="section",
+                project=project,
+                doc=md_path.stem,
+                section=section["id"],
+                label=f"{md_path.stem}: {section['title']}",
+            )
+
+    chunks_path = project_dir / "transcript_chunks.json"
+    if storage.exists(chunks_path):
+        try:
+            chunks = storage.read_json(chunks_path)
+        except json.JSONDecodeError:
+            chunks = []
+        for n, chunk in enumerate(chunks if isinstance(chunks, list) else []):
+            index.add(
+                f"chunk:{project}:{n}",
+                chunk.get("text", ""),
+                kind="chunk",
+                project=project,
+                chunk=n,
+                start=chunk.get("start", 0),
+                label=f"Transcript at {float(chunk.get('start', 0)):.0f}s",
+            )
+
+    return len(index) - before
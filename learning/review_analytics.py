@@ -0,0 +1,297 @@
+"""Columnar analytics over ``review_log.json``.
+
+New log entries are periodically compacted into ``review_events.npz`` as
+parallel arrays (card hash, timestamp, correct flag, project code). All
+statistics are then computed with NumPy group-by operations (``unique`` +
+``bincount``) instead of Python loops, and written to ``review_stats.json``
+so the ``/stats`` page only has to load a small precomputed file. Log
+entries whose timestamp cannot be parsed are skipped and counted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from learning import review_log
+
+DAY = 86400
+# Upper bounds (in days) of the forgetting-curve buckets; the last is open.
+INTERVAL_EDGES = [1, 2, 4, 8, 16, 32, 64]
+HARDEST_LIMIT = 10
+MIN_ATTEMPTS = 2
+# Stats mention the last week, so they are recomputed at least daily.
+STATS_MAX_AGE = DAY
+
+COLUMNS = ("card", "ts", "correct", "project")
+
+
+def card_key(question: str) -> int:
+    """Return a stable 64-bit key for a card's question text."""
+    return int.from_bytes(hashlib.blake2b(question.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def empty_events() -> Dict[str, np.ndarray]:
+    return {
+        "card": np.zeros(0, dtype=np.uint64),
+        "ts": np.zeros(0, dtype=np.int64),
+        "correct": np.zeros(0, dtype=bool),
+        "project": np.zeros(0, dtype=np.int32),
+        "card_keys": np.zeros(0, dtype=np.uint64),
+        "card_questions": np.zeros(0, dtype=str),
+        "projects": np.zeros(0, dtype=str),
+        "n_entries": np.int64(0),
+        "n_skipped": np.int64(0),
+        "base_version": np.array([0, -1], dtype=np.int64),
+        "journal_offset": np.int64(0),
+    }
+
+
+def load_events(store_path: Path) -> Dict[str, np.ndarray]:
+    if not store_path.exists():
+        return empty_events()
+    with np.load(store_path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def save_events(events: Dict[str, np.ndarray], store_path: Path) -> None:
+    tmp = store_path.with_name(store_path.name + ".tmp")
+    with tmp.open("wb") as f:
+        np.savez(f, **events)
+    os.replace(tmp, store_path)
+
+
+def _parse_timestamps(entries: List) -> Tuple[List[Dict], np.ndarray]:
+    """Return the entries with a valid ISO-8601 timestamp and their epoch seconds."""
+    valid, cleaned = [], []
+    for entry in entries:
+        try:
+            stamp = review_log.normalize_timestamp(entry["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        valid.append(entry)
+        cleaned.append(stamp[:-1])
+    seconds = np.array(cleaned, dtype="datetime64[us]").astype("datetime64[s]").astype(np.int64)
+    return valid, seconds
+
+
+def compact(log_path: Path, store_path: Path) -> Dict[str, np.ndarray]:
+    """Append log entries not yet in *store_path* and return all events.
+
+    The store remembers how many log entries it has consumed and how far
+    into the journal it has read. While ``review_log.json`` itself is
+    unchanged only the journal past that offset is read; after the journal
+    was folded into the log, the log is reread and entries are skipped by
+    count. If the log shrank the store is rebuilt from scratch. Entries
+    without a parsable timestamp are counted in ``n_skipped`` instead of
+    being stored.
+    """
+    events = load_events(store_path)
+    done = int(events["n_entries"])
+    base_version = review_log.base_version(log_path)
+    offset = int(events.get("journal_offset", 0))
+    stored_base = events.get("base_version")
+    incremental = (
+        stored_base is not None
+        and stored_base.tolist() == base_version
+        and review_log.version(log_path)[3] >= offset
+    )
+    if incremental:
+        new, offset = review_log.read_journal(log_path, offset)
+        if not new:
+            return events
+        total = done + len(new)
+    else:
+        journal, offset = review_log.read_journal(log_path)
+        log = review_log.read_base(log_path) + journal
+        if done > len(log):
+            events, done = empty_events(), 0
+        new, total = log[done:], len(log)
+    tail, timestamps = _parse_timestamps(new)
+    skipped = int(events.get("n_skipped", 0)) + len(new) - len(tail)
+
+    questions = {int(k): str(q) for k, q in zip(events["card_keys"], events["card_questions"])}
+    projects = [str(p) for p in events["projects"]]
+    project_codes = {p: i for i, p in enumerate(projects)}
+
+    cards = np.empty(len(tail), dtype=np.uint64)
+    codes = np.empty(len(tail), dtype=np.int32)
+    for i, entry in enumerate(tail):
+        question = entry.get("question", "")
+        key = card_key(question)
+        cards[i] = key
+        questions.setdefault(key, question)
+        project = entry.get("project", "default")
+        if project not in project_codes:
+            project_codes[project] = len(projects)
+            projects.append(project)
+        codes[i] = project_codes[project]
+
+    keys = sorted(questions)
+    events = {
+        "card": np.concatenate([events["card"], cards]),
+        "ts": np.concatenate([events["ts"], timestamps]),
+        "correct": np.concatenate(
+            [events["correct"], np.array([bool(e.get("correct")) for e in tail], dtype=bool)]
+        ),
+        "project": np.concatenate([events["project"], codes]),
+        "card_keys": np.array(keys, dtype=np.uint64),
+        "card_questions": np.array([questions[k] for k in keys], dtype=str),
+        "projects": np.array(projects, dtype=str),
+        "n_entries": np.int64(total),
+        "n_skipped": np.int64(skipped),
+        "base_version": np.array(base_version, dtype=np.int64),
+        "journal_offset": np.int64(offset),
+    }
+    save_events(events, store_path)
+    return events
+
+
+def _accuracy(correct: np.ndarray, total: np.ndarray) -> np.ndarray:
+    return np.divide(correct, total, out=np.zeros(len(total)), where=total > 0)
+
+
+def _hardest(events: Dict[str, np.ndarray], mask: np.ndarray, limit: int) -> List[Dict]:
+    cards, inverse = np.unique(events["card"][mask], return_inverse=True)
+    if not len(cards):
+        return []
+    attempts = np.bincount(inverse)
+    correct = np.bincount(inverse, weights=events["correct"][mask])
+    accuracy = _accuracy(correct, attempts)
+    eligible = np.flatnonzero(attempts >= MIN_ATTEMPTS)
+    order = eligible[np.lexsort((-attempts[eligible], accuracy[eligible]))][:limit]
+    lookup = np.searchsorted(events["card_keys"], cards[order])
+    return [
+        {
+            "question": str(events["card_questions"][j]),
+            "attempts": int(attempts[i]),
+            "accuracy": round(float(accuracy[i]), 3),
+        }
+        for i, j in zip(order, lookup)
+    ]
+
+
+def compute_stats(events: Dict[str, np.ndarray], now: int) -> Dict:
+    """Aggregate *events* into the JSON-friendly statistics shown on /stats."""
+    card, ts, correct, project = (events[c] for c in COLUMNS)
+    n = len(ts)
+    stats: Dict = {
+        "events": n,
+        "skipped": int(events.get("n_skipped", 0)),
+        "generated_at": int(now),
+        "accuracy": 0.0,
+        "cards": 0,
+        "lapses": 0,
+        "projects": [],
+        "daily": [],
+        "retention": [],
+        "hardest": [],
+        "hardest_week": [],
+    }
+    if not n:
+        return stats
+
+    # Per card: attempts, accuracy and lapses (a miss right after a success).
+    order = np.lexsort((ts, card))
+    card_s, ts_s, correct_s = card[order], ts[order], correct[order]
+    same_card = np.zeros(n, dtype=bool)
+    same_card[1:] = card_s[1:] == card_s[:-1]
+    lapse = same_card & ~correct_s & np.roll(correct_s, 1)
+    stats["accuracy"] = round(float(correct.mean()), 3)
+    stats["cards"] = int(len(np.unique(card)))
+    stats["lapses"] = int(lapse.sum())
+
+    # Per project retention.
+    attempts = np.bincount(project, minlength=len(events["projects"]))
+    right = np.bincount(project, weights=correct, minlength=len(events["projects"]))
+    stats["projects"] = [
+        {"project": str(name), "attempts": int(a), "accuracy": round(float(acc), 3)}
+        for name, a, acc in zip(events["projects"], attempts, _accuracy(right, attempts))
+        if a
+    ]
+
+    # Accuracy per UTC day.
+    days, inverse = np.unique(ts // DAY, return_inverse=True)
+    day_attempts = np.bincount(inverse)
+    day_acc = _accuracy(np.bincount(inverse, weights=correct), day_attempts)
+    stats["daily"] = [
+        {"day": str(np.datetime64(int(d), "D")), "attempts": int(a), "accuracy": round(float(acc), 3)}
+        for d, a, acc in zip(days, day_attempts, day_acc)
+    ]
+
+    # Forgetting curve: accuracy by days since the card's previous review.
+    gaps = (ts_s[1:] - ts_s[:-1])[same_card[1:]] / DAY
+    recalled = correct_s[1:][same_card[1:]]
+    bucket = np.digitize(gaps, INTERVAL_EDGES)
+    total = np.bincount(bucket, minlength=len(INTERVAL_EDGES) + 1)
+    acc = _accuracy(np.bincount(bucket, weights=recalled, minlength=len(INTERVAL_EDGES) + 1), total)
+    labels = [f"< {INTERVAL_EDGES[0]}d"] + [
+        f"{lo}-{hi}d" for lo, hi in zip(INTERVAL_EDGES, INTERVAL_EDGES[1:])
+    ] + [f">= {INTERVAL_EDGES[-1]}d"]
+    stats["retention"] = [
+        {"interval": label, "reviews": int(t), "accuracy": round(float(a), 3)}
+        for label, t, a in zip(labels, total, acc)
+        if t
+    ]
+
+    stats["hardest"] = _hardest(events, np.ones(n, dtype=bool), HARDEST_LIMIT)
+    stats["hardest_week"] = _hardest(events, ts >= now - 7 * DAY, HARDEST_LIMIT)
+    return stats
+
+
+def refresh(log_path: Path, store_path: Path, stats_path: Path, now: Optional[int] = None) -> Dict:
+    """Return precomputed stats, recomputing if the log changed or they aged.
+
+    The stats record the :func:`review_log.version` they were computed from.
+    Stats older than ``STATS_MAX_AGE`` are recomputed even for an unchanged
+    log, since the last-week figures depend on the current time.
+    """
+    if now is None:
+        now = int(np.datetime64("now", "s").astype(np.int64))
+    log_version = review_log.version(log_path)
+    if stats_path.exists():
+        try:
+            cached = json.loads(stats_path.read_text())
+        except json.JSONDecodeError:
+            cached = None
+        if (
+            isinstance(cached, dict)
+            and cached.get("log_version") == log_version
+            and now - cached.get("generated_at", now) < STATS_MAX_AGE
+        ):
+            return cached
+    stats = compute_stats(compact(log_path, store_path), now)
+    stats["log_version"] = log_version
+    stats_path.write_text(json.dumps(stats), encoding="utf-8")
+    return stats
+
+
+def main() -> None:
+    import argparse
+
+    base_dir = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Compact the review log and compute statistics")
+    parser.add_argument("--log", default=str(base_dir / "review_log.json"), help="Review log path")
+    parser.add_argument(
+        "--store", default=str(base_dir / "review_events.npz"), help="Columnar event store"
+    )
+    parser.add_argument("--stats", default=str(base_dir / "review_stats.json"), help="Stats output")
+    args = parser.parse_args()
+
+    stats_path = Path(args.stats)
+    if stats_path.exists():
+        stats_path.unlink()
+    stats = refresh(Path(args.log), Path(args.store), stats_path)
+    print(f"Compacted {stats['events']} review events; overall accuracy {stats['accuracy']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Read and append review outcomes stored in ``review_log.json``.
+
+New entries are appended one JSON object per line to a journal beside the
+log (``review_log.jsonl``), so logging a review costs the same however long
+the log is. Readers see the log followed by the journal; :func:`write_log`
+folds the journal back into the log.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+
+def journal_path(path: Path) -> Path:
+    return path.with_suffix(".jsonl")
+
+
+def read_base(path: Path) -> List[Dict]:
+    """Return the entries in the log file itself, without the journal."""
+    if not path.exists():
+        return []
+    try:
+        data = json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return []
+    return data if isinstance(data, list) else []
+
+
+def read_journal(path: Path, offset: int = 0) -> Tuple[List[Dict], int]:
+    """Return journal entries from byte *offset* on and the offset after them.
+
+    Only complete lines are read, so an append still in progress is picked
+    up by the next call; a line torn by a crash is skipped.
+    """
+    journal = journal_path(path)
+    if not journal.exists():
+        return [], offset
+    with journal.open("rb") as f:
+        f.seek(offset)
+        data = f.read()
+    complete = data[: data.rfind(b"\n") + 1]
+    entries = []
+    for line in complete.splitlines():
+        try:
+            entry = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if isinstance(entry, dict):
+            entries.append(entry)
+    return entries, offset + len(complete)
+
+
+def read_log(path: Path) -> List[Dict]:
+    return read_base(path) + read_journal(path)[0]
+
+
+def write_log(log: List[Dict], path: Path) -> None:
+    """Replace the log atomically and drop the journal it now contains."""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(log, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    journal_path(path).unlink(missing_ok=True)
+
+
+def _stamp(path: Path) -> List[int]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return [0, -1]
+    return [st.st_mtime_ns, st.st_size]
+
+
+def base_version(path: Path) -> List[int]:
+    """Return the mtime and size of the log file without the journal."""
+    return _stamp(path)
+
+
+def version(path: Path) -> List[int]:
+    """Return the mtimes and sizes of the log and its journal.
+
+    Appends always change the journal size, so two versions compare equal
+    only if nothing was logged in between, even within one mtime tick.
+    """
+    return _stamp(path) + _stamp(journal_path(path))
+
+
+def normalize_timestamp(value) -> str:
+    """Return ISO-8601 *value* as a UTC ``YYYY-MM-DDTHH:MM:SS[.ffffff]Z`` string.
+
+    A trailing ``Z`` and UTC offsets are accepted; a time without an offset
+    is taken to be UTC. Raises ``ValueError`` for anything else.
+    """
+    if not isinstance(value, str):
+        raise ValueError("timestamp must be a string")
+    text = value.strip()
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat() + "Z"
+
+
+def make_entry(question: str, correct: bool, **extra) -> Dict:
+    entry = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "question": question,
+        "correct": correct,
+    }
+    entry.update(extra)
+    return entry
+
+
+def append_entries(entries: Iterable[Dict], path: Path) -> Tuple[int, int]:
+    """Append *entries* to the journal without reading or rewriting the log.
+
+    Returns the journal byte range the entries were written to. A line torn
+    by a crash is terminated before the next one is written, and skipped by
+    :func:`read_log`.
+    """
+    data = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+    with journal_path(path).open("a+b") as f:
+        if not data:
+            return f.tell(), f.tell()
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        end = f.tell()
+    return end - len(data), end
@@ -1,15 +1,24 @@
+import hashlib
 import json
+import os
 from datetime import date, timedelta
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional, Tuple
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from utils import storage
 
 SCHEDULE_DAYS = [1, 3, 7, 14, 30]
+QUEUE_PATH = BASE_DIR / "spaced_review_queue.json"
 
 
 def load_flashcards(path: Path) -> List[Dict[str, str]]:
-    if not path.exists():
+    if not storage.exists(path):
         raise FileNotFoundError(f"Flashcards not found: {path}")
-    return json.loads(path.read_text())
+    return storage.read_json(path)
 
 
 def build_queue(cards: List[Dict[str, str]], start: date) -> List[Dict[str, str]]:
@@ -26,7 +35,9 @@ def build_queue(cards: List[Dict[str, str]], start: date) -> List[Dict[str, str]
 
 
 def write_queue(queue: List[Dict[str, str]], path: Path) -> None:
-    path.write_text(json.dumps(queue, indent=2), encoding="utf-8")
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(queue, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
 
 
 def read_queue(path: Path) -> List[Dict[str, str]]:
@@ -39,15 +50,97 @@ def due_today(queue: List[Dict[str, str]], today: date) -> List[Dict[str, str]]:
     iso = today.isoformat()
     return [item for item in queue if item.get("due_date") == iso]
 
-def get_due_flashcards(queue_path: Path) -> List[Dict[str, str]]:
-    """Return flashcards due today from the given queue path."""
-    queue = read_queue(queue_path)
+
+def get_due_flashcards(queue_path: Optional[Path] = None) -> List[Dict[str, str]]:
+    """Return flashcards due today from *queue_path* (default ``QUEUE_PATH``)."""
+    queue = read_queue(queue_path or QUEUE_PATH)
     return due_today(queue, date.today())
 
 
+def card_id(item: Dict[str, str]) -> str:
+    """Return a stable ID for a queue item (one review of one card)."""
+    key = "\0".join([item.get("question", ""), item.get("answer", ""), item.get("due_date", "")])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def pending_due(queue: List[Dict[str, str]], today: date) -> List[Dict[str, str]]:
+    """Return items due *today* that have not been reviewed yet."""
+    return [item for item in due_today(queue, today) if not item.get("reviewed")]
+
+
+def due_page(
+    queue: List[Dict[str, str]], today: date, after: int = 0, limit: int = 50
+) -> Tuple[List[Tuple[str, Dict[str, str]]], Optional[int], int]:
+    """Return one page of unreviewed cards due *today*.
+
+    Today's distinct cards are numbered from 1 in queue order, which
+    reviewing does not change. The page holds up to *limit* unreviewed
+    ``(card_id, item)`` pairs numbered above *after*, and the next cursor
+    is the number of the last one, or ``None`` when no unreviewed card
+    follows. Cards reviewed between requests therefore do not shift later
+    pages. Also returns how many cards are still to review.
+    """
+    page: List[Tuple[str, Dict[str, str]]] = []
+    next_cursor: Optional[int] = None
+    more = False
+    total = 0
+    seen = set()
+    for item in due_today(queue, today):
+        item_id = card_id(item)
+        if item_id in seen:
+            continue
+        seen.add(item_id)
+        position = len(seen)
+        if item.get("reviewed"):
+            continue
+        total += 1
+        if position <= after:
+            continue
+        if len(page) < limit:
+            page.append((item_id, item))
+            next_cursor = position
+        else:
+            more = True
+    return page, next_cursor if more else None, total
+
+
+def apply_results(queue: List[Dict[str, str]], results: Iterable[Dict], today: date) -> List[str]:
+    """Mark reviewed queue items and schedule a retry for missed cards.
+
+    Each result needs ``card_id`` (see :func:`card_id`) and ``correct``.
+    An incorrect answer adds a review due the next day. Applying the same
+    results twice leaves the queue unchanged. Returns the IDs that matched.
+    """
+    by_id: Dict[str, List[Dict[str, str]]] = {}
+    for item in queue:
+        by_id.setdefault(card_id(item), []).append(item)
+    applied = []
+    for result in results:
+        items = by_id.get(result.get("card_id"))
+        if not items:
+            continue
+        correct = bool(result.get("correct"))
+        # Identical cards due the same day share an ID and are reviewed together.
+        for item in items:
+            item["reviewed"] = True
+            item["correct"] = correct
+        applied.append(result["card_id"])
+        if not correct:
+            retry = {
+                "question": items[0].get("question", ""),
+                "answer": items[0].get("answer", ""),
+                "due_date": (today + timedelta(days=1)).isoformat(),
+            }
+            retry_id = card_id(retry)
+            if retry_id not in by_id:
+                queue.append(retry)
+                by_id[retry_id] = [retry]
+    return applied
+
+
 def main() -> None:
     flashcards_path = Path("flashcards.json")
-    queue_path = Path("spaced_review_queue.json")
+    queue_path = QUEUE_PATH
     queue = read_queue(queue_path)
     return due_today(queue, date.today())
 
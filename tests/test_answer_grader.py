@@ -0,0 +1,44 @@
+from pathlib import Path
+import random
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from learning import answer_grader
+
+
+def _dp(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def test_levenshtein_matches_dynamic_programming():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = "".join(rng.choice("abcé ") for _ in range(rng.randrange(0, 80)))
+        b = "".join(rng.choice("abcé ") for _ in range(rng.randrange(0, 80)))
+        assert answer_grader.levenshtein(a, b) == _dp(a, b)
+    assert answer_grader.levenshtein("kitten", "sitting") == 3
+    assert answer_grader.levenshtein("", "abc") == 3
+
+
+def test_normalize_ignores_case_accents_punctuation_and_articles():
+    assert answer_grader.normalize("  The Café, an ÉTUDE!  ") == "cafe etude"
+
+
+def test_grade_verdicts():
+    expected = "Paris is the capital of France."
+    assert answer_grader.grade("paris is the capital of france", expected)["verdict"] == "correct"
+    assert answer_grader.grade("capital of France is Paris", expected)["verdict"] == "correct"
+    assert answer_grader.grade("Pariss is capital of Frnace", expected)["verdict"] == "correct"
+    assert answer_grader.grade("Paris is a city in France", expected)["verdict"] == "close"
+    assert answer_grader.grade("Paris", expected)["verdict"] == "incorrect"
+    assert answer_grader.grade("", expected) == {"score": 0.0, "verdict": "incorrect"}
+    assert [g["verdict"] for g in answer_grader.grade_many([("x", "x"), ("x", "yz")])] == [
+        "correct",
+        "incorrect",
+    ]
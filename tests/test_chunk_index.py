@@ -0,0 +1,126 @@
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ingestion import chunk_index
+from ingestion.document_ingestor import write_sections
+from learning.flashcard_gen import generate_flashcards
+from utils import storage
+
+import pytest
+
+
+def _words(start, count):
+    return " ".join(f"w{n}" for n in range(start, start + count))
+
+
+def test_chunk_spans_use_fixed_windows_with_overlap():
+    body = _words(0, 10).encode()
+    spans = chunk_index.chunk_spans(body, window=4, overlap=1)
+    assert [body[s:e].decode() for s, e, _ in spans] == [
+        "w0 w1 w2 w3",
+        "w3 w4 w5 w6",
+        "w6 w7 w8 w9",
+    ]
+    assert [t for _, _, t in spans] == [4, 4, 4]
+
+
+@pytest.mark.parametrize("codec", ["none", "gzip", "xz"])
+def test_write_sections_emits_readable_index(tmp_path, monkeypatch, codec):
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION", codec)
+    md = tmp_path / "book.md"
+    write_sections(
+        [{"title": "One", "text": _words(0, 300)}, {"title": "Zwei ü", "text": "kurz."}],
+        md,
+    )
+    index = chunk_index.load_index(md)
+
+    assert index["size"] == len(storage.read_bytes(md))
+    # Indexed Markdown stays plain whatever the configured codec.
+    assert storage.resolve(md) == md
+    assert [s["title"] for s in index["sections"]] == ["One", "Zwei ü"]
+    assert chunk_index.read_section(md, index, 1) == "kurz."
+    first = chunk_index.read_chunk(md, index, 0)
+    assert first.split()[0] == "w0" and len(first.split()) == chunk_index.WINDOW_TOKENS
+    assert list(chunk_index.iter_chunks(md, index))[-1] == "kurz."
+    assert chunk_index.map_chunks(len, md, index, workers=2) == [
+        len(t) for t in chunk_index.iter_chunks(md, index)
+    ]
+    # A scan of the written file agrees with the index recorded while writing.
+    assert chunk_index.build_index(md) == index
+
+
+def test_read_chunk_is_one_pread_of_the_chunk(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION", "gzip")
+    md = tmp_path / "big.md"
+    write_sections([{"title": f"S{n}", "text": _words(n * 1000, 1000)} for n in range(20)], md)
+    index = chunk_index.load_index(md)
+    last = index["chunks"][-1]
+
+    reads = []
+    pread = chunk_index.os.pread
+    monkeypatch.setattr(
+        chunk_index.os, "pread", lambda fd, n, off: reads.append(n) or pread(fd, n, off)
+    )
+    monkeypatch.setattr(storage, "open_read", lambda *a, **k: pytest.fail("stream opened"))
+    assert chunk_index.read_chunk(md, index, last["id"]).split()[-1] == "w19999"
+    assert reads == [last["length"]]
+    assert sum(reads) < index["size"] / 50
+
+
+def test_compressed_markdown_from_older_versions_is_still_read(tmp_path, monkeypatch):
+    md = tmp_path / "old.md"
+    write_sections([{"title": "A", "text": _words(0, 300)}, {"title": "B", "text": "tail."}], md)
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION", "gzip")
+    storage.write_bytes(md, storage.read_bytes(md))
+    assert storage.codec_of(storage.resolve(md)) == "gzip"
+
+    index = chunk_index.ensure_index(md)
+    assert list(chunk_index.iter_chunks(md, index))[-1] == "tail."
+    assert chunk_index.read_chunk(md, index, 1).split()[0] == "w160"
+
+
+def test_update_index_reuses_unchanged_sections(tmp_path, monkeypatch):
+    md = tmp_path / "book.md"
+    write_sections([{"title": "A", "text": "alpha beta"}, {"title": "B", "text": _words(0, 50)}], md)
+    write_sections(
+        [{"title": "A", "text": "alpha beta gamma delta"}, {"title": "B", "text": _words(0, 50)}],
+        md,
+        index=False,
+    )
+
+    calls = []
+    original = chunk_index.chunk_spans
+    monkeypatch.setattr(
+        chunk_index, "chunk_spans", lambda body, *a: calls.append(bytes(body)) or original(body, *a)
+    )
+    index = chunk_index.update_index(md)
+
+    assert calls == [b"alpha beta gamma delta"]
+    assert chunk_index.read_section(md, index, 1) == _words(0, 50)
+    assert chunk_index.read_chunk(md, index, index["sections"][1]["chunks"][0]) == _words(0, 50)
+
+
+def test_generate_flashcards_accepts_passage_iterator():
+    consumed = []
+
+    def chunks():
+        for text in ["One. Two. Three.", "Three. Four. Five.", "Six."]:
+            consumed.append(text)
+            yield text
+
+    cards = generate_flashcards(chunks())
+    assert [c["answer"] for c in cards] == ["One", "Two", "Three", "Four", "Five"]
+    assert len(consumed) == 2
+
+
+def test_flashcards_from_sections_keep_long_sentences_whole(tmp_path):
+    sentences = [_words(i * 90, 90) for i in range(4)]
+    md = tmp_path / "long.md"
+    write_sections([{"title": "Long", "text": ". ".join(sentences) + "."}], md)
+    index = chunk_index.load_index(md)
+    assert len(index["chunks"]) > 1
+
+    cards = generate_flashcards(text for _, text in chunk_index.iter_sections(md, index))
+    assert [c["answer"] for c in cards[:4]] == sentences
+    assert cards[4]["answer"] == "Example answer 5"
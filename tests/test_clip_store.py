@@ -0,0 +1,87 @@
+from pathlib import Path
+import json
+import random
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from videos.clip_store import ClipStore, VideoClips
+
+
+def test_add_coalesces_overlapping_and_adjacent_clips():
+    clips = VideoClips()
+    clips.add(10, 20)
+    clips.add(40, 50)
+    clips.add(30, 25)  # reversed bounds are swapped
+    assert list(zip(clips.starts, clips.ends)) == [(10, 20), (25, 30), (40, 50)]
+    assert clips.add(20.3, 24.8) == (10, 30)  # touches both neighbours within the gap
+    assert clips.add(45, 60) == (40, 60)
+    assert list(zip(clips.starts, clips.ends)) == [(10, 30), (40, 60)]
+
+
+def test_overlap_and_stabbing_queries_match_brute_force():
+    rng = random.Random(3)
+    clips = VideoClips()
+    raw = []
+    for _ in range(300):
+        start = rng.uniform(0, 5000)
+        end = start + rng.uniform(1, 30)
+        raw.append((start, end))
+        clips.add(start, end, gap=0)
+    assert clips.starts == sorted(clips.starts)
+    assert all(e < s for e, s in zip(clips.ends, clips.starts[1:]))
+    for _ in range(200):
+        lo = rng.uniform(0, 5000)
+        hi = lo + rng.uniform(0, 200)
+        expected = [(s, e) for s, e in zip(clips.starts, clips.ends) if s <= hi and e >= lo]
+        assert clips.overlapping(lo, hi) == expected
+        # Every raw clip touching the window lies inside a returned clip.
+        for s, e in raw:
+            if s <= hi and e >= lo:
+                assert any(cs <= s and e <= ce for cs, ce in expected)
+    s, e = clips.starts[5], clips.ends[5]
+    assert clips.at((s + e) / 2) == (s, e)
+    assert clips.at(-1) is None
+
+
+def test_store_persists_per_video_and_imports_legacy(tmp_path):
+    legacy = tmp_path / "video_clips.json"
+    legacy.write_text(
+        json.dumps(
+            [
+                {"video": "a.mp4", "start": 0, "end": 5},
+                {"video": "a.mp4", "start": 4, "end": 9},
+                {"video": "b c.mp4", "start": 100, "end": 110},
+                {"video": "bad"},
+            ]
+        )
+    )
+    store = ClipStore(tmp_path / "clips")
+    assert store.import_legacy(legacy) == 3
+    assert not legacy.exists()
+    assert store.import_legacy(legacy) == 0
+
+    store.add("a.mp4", 60, 70)
+    reopened = ClipStore(tmp_path / "clips")
+    assert reopened.clips("a.mp4") == [(0, 9), (60, 70)]
+    assert reopened.overlapping("a.mp4", 8, 65) == [(0, 9), (60, 70)]
+    assert reopened.overlapping("b c.mp4", 0, 50) == []
+    assert reopened.at("b c.mp4", 105) == (100, 110)
+    assert reopened.clips("missing.mp4") == []
+
+    # A write from another store instance is picked up.
+    store.add("a.mp4", 200, 210)
+    assert reopened.overlapping("a.mp4", 205, 205) == [(200, 210)]
+
+
+@pytest.mark.parametrize("start,end", [(float("nan"), 5), (0, float("inf")), (-1, 5), ("x", 5), (None, 5)])
+def test_store_rejects_invalid_times(tmp_path, start, end):
+    store = ClipStore(tmp_path / "clips")
+    with pytest.raises(ValueError):
+        store.add("a.mp4", start, end)
+    assert store.clips("a.mp4") == []
+
+    legacy = tmp_path / "video_clips.json"
+    legacy.write_text(json.dumps([{"video": "a.mp4", "start": start, "end": end}]))
+    assert store.import_legacy(legacy) == 0
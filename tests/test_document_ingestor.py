@@ -0,0 +1,85 @@
+from pathlib import Path
+import sys
+import zipfile
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ingestion import document_ingestor
+from utils import storage
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>"""
+
+PACKAGE = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0">
+  <manifest>
+    <item id="c1" href="text/one.xhtml" media-type="application/xhtml+xml"/>
+    <item id="c2" href="text/two%20b.xhtml" media-type="application/xhtml+xml"/>
+    <item id="css" href="style.css" media-type="text/css"/>
+  </manifest>
+  <spine>
+    <itemref idref="c2"/>
+    <itemref idref="c1"/>
+  </spine>
+</package>"""
+
+
+def _write_epub(path: Path) -> None:
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("mimetype", "application/epub+zip")
+        zf.writestr("META-INF/container.xml", CONTAINER)
+        zf.writestr("OEBPS/content.opf", PACKAGE)
+        zf.writestr("OEBPS/style.css", "p { color: red; }")
+        zf.writestr(
+            "OEBPS/text/one.xhtml",
+            '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>ignored</title>'
+            "<style>p {}</style></head><body><p>No heading here.</p></body></html>",
+        )
+        zf.writestr(
+            "OEBPS/text/two b.xhtml",
+            '<html xmlns="http://www.w3.org/1999/xhtml"><body><h1>Chapter <em>Two</em></h1>'
+            "<p>Hello <b>wo</b>rld.</p><script>skip()</script></body></html>",
+        )
+
+
+def test_iter_epub_sections_follows_spine(tmp_path):
+    book = tmp_path / "book.epub"
+    _write_epub(book)
+
+    sections = list(document_ingestor.iter_epub_sections(book))
+
+    assert [s["title"] for s in sections] == ["Chapter Two", "text/one.xhtml"]
+    assert sections[0]["text"] == "Chapter Two\nHello world."
+    assert sections[1]["text"] == "No heading here."
+
+
+def test_ingest_document_streams_epub(tmp_path, monkeypatch):
+    book = tmp_path / "book.epub"
+    _write_epub(book)
+    monkeypatch.chdir(tmp_path)
+
+    output = document_ingestor.ingest_document(str(book), "proj")
+
+    assert output == Path("data") / "projects" / "proj" / "book.md"
+    assert storage.read_text(output).startswith("# Chapter Two\n\nChapter Two\nHello world.")
+
+
+def test_epub_chapters_without_declaration_are_utf8(tmp_path):
+    book = tmp_path / "book.epub"
+    with zipfile.ZipFile(book, "w") as zf:
+        zf.writestr("META-INF/container.xml", CONTAINER)
+        zf.writestr("OEBPS/content.opf", PACKAGE)
+        zf.writestr("OEBPS/text/one.xhtml", "<html><body><h1>Café</h1><p>Crème brûlée.</p></body></html>")
+        zf.writestr(
+            "OEBPS/text/two b.xhtml",
+            '<?xml version="1.0" encoding="ISO-8859-1"?>'.encode()
+            + "<html><body><p>Déjà vu.</p></body></html>".encode("latin-1"),
+        )
+
+    sections = list(document_ingestor.iter_epub_sections(book))
+    assert sections[0]["text"] == "Déjà vu."
+    assert sections[1]["title"] == "Café"
+    assert sections[1]["text"] == "Café\nCrème brûlée."
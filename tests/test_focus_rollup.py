@@ -0,0 +1,61 @@
+from pathlib import Path
+from datetime import date, datetime
+import json
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils import focus_rollup, focus_timer
+
+
+def _log(log_path, day, minutes=25, session_type="read", project="p1"):
+    start = datetime.fromisoformat(f"{day}T09:00:00")
+    end = datetime.fromisoformat(f"{day}T09:{minutes:02d}:00")
+    focus_timer.log_session(start, end, session_type, project, log_path)
+
+
+def test_log_session_updates_rollup_and_streak(tmp_path):
+    log_path = tmp_path / "focus_log.json"
+    for day in ["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-04", "2024-01-05"]:
+        _log(log_path, day)
+    _log(log_path, "2024-01-05", minutes=50, session_type="build", project="p2")
+
+    rollup = focus_rollup.load_rollup(tmp_path / "focus_rollup.json")
+    assert focus_rollup.current_streak(rollup) == 2
+    assert rollup["days"]["2024-01-05"] == {
+        "sessions": 2,
+        "minutes": 75,
+        "types": {"read": 1, "build": 1},
+    }
+    assert rollup["projects"]["p2"] == {
+        "2024-01-05": {"sessions": 1, "minutes": 50, "types": {"build": 1}}
+    }
+    assert rollup["last_session"]["project_id"] == "p2"
+
+    # Back-filling the gap joins both runs.
+    _log(log_path, "2024-01-03")
+    rollup = focus_rollup.load_rollup(tmp_path / "focus_rollup.json")
+    assert focus_rollup.current_streak(rollup) == 5
+
+
+def test_rebuild_matches_incremental_rollup(tmp_path):
+    log_path = tmp_path / "focus_log.json"
+    for day in ["2024-02-27", "2024-02-28", "2024-03-01"]:
+        _log(log_path, day)
+    incremental = focus_rollup.load_rollup(tmp_path / "focus_rollup.json")
+
+    rebuilt = focus_rollup.rebuild(log_path, tmp_path / "rebuilt.json")
+    assert rebuilt == incremental
+    assert focus_rollup.weekly_totals(rebuilt) == {"2024-W09": 75}
+    assert focus_rollup.heatmap(rebuilt, date(2024, 3, 1), days=3) == [
+        ("2024-02-28", 25),
+        ("2024-02-29", 0),
+        ("2024-03-01", 25),
+    ]
+
+
+def test_load_current_rebuilds_when_rollup_missing(tmp_path):
+    log_path = tmp_path / "focus_log.json"
+    log_path.write_text(json.dumps([{"session_length": 25, "completed_at": "2024-01-01T10:00:00Z"}]))
+    rollup = focus_rollup.load_current(log_path, tmp_path / "focus_rollup.json")
+    assert rollup["totals"] == {"sessions": 1, "minutes": 25}
+    assert focus_rollup.current_streak(rollup) == 0
@@ -0,0 +1,120 @@
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.focus_scheduler import FocusScheduler
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sessions_expire_in_deadline_order(tmp_path):
+    clock = FakeClock(1000.0)
+    expired = []
+    scheduler = FocusScheduler(tmp_path / "sessions.json", expired.append, clock)
+    long = scheduler.add(50, "build", "p1")
+    short = scheduler.add(25, "read", "p2")
+
+    assert scheduler.run_pending() == []
+    assert scheduler.status(short.session_id)["remaining"] == 25 * 60
+
+    clock.now += 25 * 60
+    scheduler.run_pending()
+    assert [s.session_id for s in expired] == [short.session_id]
+    assert scheduler.status(short.session_id)["status"] == "completed"
+    assert scheduler.status(long.session_id)["status"] == "running"
+
+
+def test_sessions_survive_restart(tmp_path):
+    state = tmp_path / "sessions.json"
+    clock = FakeClock(1000.0)
+    session = FocusScheduler(state, lambda s: None, clock).add(25, "read", "p1")
+
+    expired = []
+    clock.now += 3600
+    restarted = FocusScheduler(state, expired.append, clock)
+    assert len(restarted) == 1
+    restarted.run_pending()
+    assert [(s.session_id, s.deadline) for s in expired] == [(session.session_id, 1000.0 + 25 * 60)]
+    assert len(FocusScheduler(state, expired.append, clock)) == 0
+
+
+def test_cancelled_session_is_not_logged(tmp_path):
+    clock = FakeClock(0.0)
+    expired = []
+    scheduler = FocusScheduler(tmp_path / "sessions.json", expired.append, clock)
+    session = scheduler.add(25, "read", "p1")
+    assert scheduler.cancel(session.session_id)
+    clock.now = 10_000
+    scheduler.run_pending()
+    assert expired == []
+    assert scheduler.status(session.session_id) is None
+
+
+def test_failed_hook_keeps_session_for_retry(tmp_path):
+    state = tmp_path / "sessions.json"
+    clock = FakeClock(0.0)
+    calls = []
+
+    def flaky(session):
+        calls.append(session.session_id)
+        if len(calls) == 1:
+            raise OSError("disk full")
+
+    scheduler = FocusScheduler(state, flaky, clock)
+    session = scheduler.add(25, "read", "p1")
+    clock.now = 25 * 60
+    assert scheduler.run_pending() == []
+    # Still persisted, so a restart at this point would not lose it.
+    assert len(FocusScheduler(state, lambda s: None, clock)) == 1
+    assert scheduler.status(session.session_id)["status"] == "running"
+
+    clock.now += 60
+    assert [s.session_id for s in scheduler.run_pending()] == [session.session_id]
+    assert calls == [session.session_id, session.session_id]
+    assert len(FocusScheduler(state, lambda s: None, clock)) == 0
+
+
+def test_second_process_cannot_start_on_same_state(tmp_path):
+    import subprocess
+    import pytest
+
+    state = tmp_path / "sessions.json"
+    FocusScheduler(state, lambda s: None).start()
+    code = (
+        "import sys; sys.path.append(%r)\n"
+        "from pathlib import Path\n"
+        "from utils.focus_scheduler import FocusScheduler\n"
+        "try:\n"
+        "    FocusScheduler(Path(%r), lambda s: None).start()\n"
+        "except RuntimeError:\n"
+        "    sys.exit(3)\n"
+    ) % (str(Path(__file__).resolve().parents[1]), str(state))
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 3
+
+
+def test_changes_are_journaled_and_compacted(tmp_path, monkeypatch):
+    from utils import focus_scheduler
+
+    monkeypatch.setattr(focus_scheduler, "COMPACT_AFTER", 10)
+    state = tmp_path / "sessions.json"
+    clock = FakeClock(0.0)
+    scheduler = FocusScheduler(state, lambda s: None, clock)
+    sessions = [scheduler.add(25, "read", f"p{n}") for n in range(6)]
+    assert not state.exists()
+    scheduler.cancel(sessions[0].session_id)
+    clock.now = 25 * 60
+    assert len(scheduler.run_pending()) == 5
+    # 6 adds, 1 cancel and 5 completions: the snapshot was written once.
+    assert state.exists() and scheduler.journal_path.exists()
+    assert len(scheduler.journal_path.read_text().splitlines()) == 2
+
+    later = scheduler.add(25, "read", "p9")
+    restarted = FocusScheduler(state, lambda s: None, clock)
+    assert len(restarted) == 1
+    assert restarted.status(later.session_id)["status"] == "running"
@@ -0,0 +1,106 @@
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from flask import Flask
+
+from utils import http_cache
+
+
+def _make_app(source: Path, calls: list) -> Flask:
+    app = Flask(__name__)
+
+    @app.route("/page")
+    @http_cache.conditional(lambda: [source])
+    def page():
+        calls.append(1)
+        return f"<p>{source.read_text()}</p>"
+
+    return app
+
+
+def test_conditional_get_skips_view(tmp_path):
+    http_cache.clear_cache()
+    source = tmp_path / "data.json"
+    source.write_text("one")
+    calls = []
+    client = _make_app(source, calls).test_client()
+
+    first = client.get("/page")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+
+    assert client.get("/page", headers={"If-None-Match": etag}).status_code == 304
+    cached = client.get("/page")
+    assert cached.data == b"<p>one</p>"
+    assert cached.headers["ETag"] == etag
+    assert len(calls) == 1
+
+    source.write_text("two!")
+    changed = client.get("/page", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.data == b"<p>two!</p>"
+    assert changed.headers["ETag"] != etag
+    assert len(calls) == 2
+
+
+def test_query_arguments_change_the_etag(tmp_path):
+    source = tmp_path / "data.json"
+    source.write_text("x")
+    client = _make_app(source, []).test_client()
+    assert client.get("/page?a=1").headers["ETag"] != client.get("/page?a=2").headers["ETag"]
+
+
+def test_compressed_views_vary_on_accept_encoding(tmp_path):
+    import gzip
+
+    http_cache.clear_cache()
+    source = tmp_path / "transcript.txt"
+    source.write_text("word " * 500)
+    app = Flask(__name__)
+
+    @app.route("/play")
+    @http_cache.conditional(lambda: [source], compress=True)
+    def play():
+        return source.read_text()
+
+    client = app.test_client()
+    plain = client.get("/play")
+    zipped = client.get("/play", headers={"Accept-Encoding": "gzip"})
+    again = client.get("/play", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert again.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(again.data) == plain.data
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+
+
+def test_version_strings_disable_last_modified(tmp_path):
+    http_cache.clear_cache()
+    source = tmp_path / "queue.json"
+    source.write_text("[]")
+    day = ["2024-01-01"]
+    app = Flask(__name__)
+
+    @app.route("/due")
+    @http_cache.conditional(lambda: [source, day[0]])
+    def due():
+        return f"due on {day[0]}"
+
+    client = app.test_client()
+    first = client.get("/due")
+    assert "Last-Modified" not in first.headers
+
+    # A client revalidating by date alone must see the new day's page.
+    day[0] = "2024-01-02"
+    since = "Sun, 01 Jan 2099 00:00:00 GMT"
+    resp = client.get("/due", headers={"If-Modified-Since": since})
+    assert resp.status_code == 200
+    assert resp.data == b"due on 2024-01-02"
+
+    missing = tmp_path / "missing.json"
+    assert http_cache.source_version([source])[1] is not None
+    assert http_cache.source_version([source, missing])[1] is None
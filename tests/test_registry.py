@@ -0,0 +1,42 @@
+from pathlib import Path
+import subprocess
+import sys
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import pytest
+
+from ingestion import registry
+
+
+def test_register_and_lookup_custom_format():
+    calls = []
+    registry.register("TXT2", lambda path, project: calls.append(path), kind="document")
+    try:
+        ingest, kind = registry.get_ingestor(".txt2")
+        assert kind == "document"
+        ingest("notes.txt2", "p")
+        assert calls == ["notes.txt2"]
+        assert ".txt2" in registry.supported_extensions()
+    finally:
+        registry._registry.pop(".txt2", None)
+        registry._loaded.pop(".txt2", None)
+
+
+def test_unknown_extension_is_rejected():
+    assert not registry.is_supported(".exe")
+    with pytest.raises(ValueError):
+        registry.get_ingestor(".exe")
+
+
+def test_heavy_libraries_load_only_on_first_use():
+    code = (
+        "import sys\n"
+        "from ingestion import registry\n"
+        "registry.get_ingestor('.pdf')\n"
+        "print(sorted(m for m in ('fitz', 'ebooklib', 'lxml') if m in sys.modules))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,126 @@
+from pathlib import Path
+import json
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ingestion.document_ingestor import write_sections
+from learning import related_index
+from learning.related_index import RelatedIndex
+
+
+def _index():
+    index = RelatedIndex()
+    index.add("a", "photosynthesis converts light energy in chloroplasts", kind="section", project="bio")
+    index.add("b", "mitochondria produce energy through respiration", kind="section", project="bio")
+    index.add("c", "chloroplasts contain chlorophyll", kind="card", project="bio")
+    index.add("d", "the french revolution began in 1789", kind="chunk", project="history")
+    return index
+
+
+def test_query_ranks_by_cosine_and_filters_kinds():
+    index = _index()
+    hits = index.query("where does photosynthesis happen? chloroplasts", k=3)
+    assert [item_id for _, item_id, _ in hits][:2] == ["a", "c"]
+    assert hits[0][0] >= hits[1][0] > 0
+
+    sections = index.query("chloroplasts energy", k=5, kinds=("section",))
+    assert {item_id for _, item_id, _ in sections} == {"a", "b"}
+    assert index.query("chloroplasts", exclude=("a", "c")) == []
+    assert index.query("unrelated words only") == []
+
+
+def test_query_with_small_budget_still_finds_best_match(monkeypatch):
+    index = RelatedIndex()
+    for n in range(50):
+        index.add(f"filler{n}", f"common shared filler{n}", project="p")
+    index.add("target", "common shared rareterm", project="p")
+    monkeypatch.setattr(related_index, "POSTINGS_BUDGET", 1)
+    hits = index.query("rareterm common shared", k=1)
+    assert hits[0][1] == "target"
+
+
+def test_add_replaces_and_remove_cleans_postings():
+    index = _index()
+    index.add("a", "entirely different words", kind="section", project="bio")
+    assert "photosynthesis" not in index.postings
+    assert index.remove("b")
+    assert not index.remove("b")
+    assert "mitochondria" not in index.postings
+    assert index.remove_project("bio") == 2
+    assert len(index) == 1
+    assert index.query("chlorophyll") == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = _index()
+    path = tmp_path / "related.json"
+    index.save(path)
+    loaded = RelatedIndex.load(path)
+    assert len(loaded) == len(index)
+    assert loaded.query("chloroplasts", k=2) == index.query("chloroplasts", k=2)
+    assert len(RelatedIndex.load(tmp_path / "missing.json")) == 0
+
+
+def test_snapshot_is_unaffected_by_later_changes(tmp_path):
+    index = _index()
+    snapshot = index.snapshot()
+    bio = index.snapshot("bio")
+    index.add("a", "completely different words", kind="section", project="bio")
+    index.remove_project("history")
+
+    loaded = RelatedIndex()
+    loaded.load_snapshot(snapshot)
+    assert len(loaded) == 4 and set(bio) == {"a", "b", "c"}
+    assert loaded.query("photosynthesis", k=1)[0][1] == "a"
+
+
+def test_store_writes_one_file_per_project_and_sees_other_writers(tmp_path):
+    legacy = tmp_path / "related_index.json"
+    _index().save(legacy)
+    writer = related_index.IndexStore(tmp_path / "related")
+    assert writer.import_legacy(legacy) == 4
+    assert not legacy.exists()
+    assert len(list((tmp_path / "related").glob("*.json"))) == 2
+
+    reader = related_index.IndexStore(tmp_path / "related")
+    assert reader.refresh() == 2
+    assert reader.index.query("revolution", k=1)[0][1] == "d"
+    assert reader.refresh() == 0
+
+    writer.refresh()
+    writer.index.remove_project("history")
+    writer.index.add("e", "the russian revolution of 1917", kind="chunk", project="history")
+    bio_file = writer._path("bio")
+    before = bio_file.stat().st_mtime_ns
+    writer.write("history", writer.index.snapshot("history"))
+    assert bio_file.stat().st_mtime_ns == before
+
+    assert reader.refresh() == 1
+    assert [i for _, i, _ in reader.index.query("revolution", k=5)] == ["e"]
+    assert set(reader.index.items) == {"a", "b", "c", "e"}
+
+
+def test_index_project_covers_cards_sections_and_chunks(tmp_path):
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    write_sections(
+        [{"title": "Cells", "text": "ribosomes assemble proteins"}, {"title": "Stars", "text": "fusion in stellar cores"}],
+        project_dir / "notes.md",
+    )
+    (project_dir / "flashcards.json").write_text(
+        json.dumps([{"question": "What assembles proteins?", "answer": "Ribosomes"}])
+    )
+    (project_dir / "transcript_chunks.json").write_text(
+        json.dumps([{"start": 12.0, "end": 20.0, "text": "stellar fusion lecture"}])
+    )
+
+    index = RelatedIndex()
+    assert related_index.index_project(index, "proj", project_dir) == 4
+    hits = index.query("ribosomes proteins", kinds=("section",))
+    assert hits[0][2]["doc"] == "notes" and hits[0][2]["section"] == 0
+    chunk = index.query("stellar fusion", kinds=("chunk",))[0]
+    assert chunk[1] == "chunk:proj:0" and chunk[2]["start"] == 12.0
+
+    # Re-indexing replaces rather than duplicates.
+    assert related_index.index_project(index, "proj", project_dir) == 4
+    assert len(index) == 4
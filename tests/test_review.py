@@ -2,6 +2,9 @@ from pathlib import Path
 from datetime import date
 import os
 import sys
+
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from learning import spaced_scheduler
@@ -16,8 +19,41 @@ def test_get_due_flashcards(tmp_path, monkeypatch):
     queue_path = tmp_path / "spaced_review_queue.json"
     queue_path.write_text(spaced_scheduler.json.dumps(data))
 
-    monkeypatch.chdir(tmp_path)
+    # The default queue lives in the repo root, not the working directory.
+    monkeypatch.setattr(spaced_scheduler, "QUEUE_PATH", queue_path)
+    monkeypatch.chdir(Path(__file__).resolve().parent)
     cards = spaced_scheduler.get_due_flashcards()
     assert len(cards) == 1
     assert cards[0]["question"] == "q1"
 
+
+def test_normalize_timestamp_converts_to_utc():
+    from learning import review_log
+
+    assert review_log.normalize_timestamp("2024-01-02T03:04:05Z") == "2024-01-02T03:04:05Z"
+    assert review_log.normalize_timestamp("2024-01-02T05:04:05+02:00") == "2024-01-02T03:04:05Z"
+    for bad in ("yesterday", 1704164645, None):
+        with pytest.raises(ValueError):
+            review_log.normalize_timestamp(bad)
+
+
+def test_append_entries_only_touches_the_journal(tmp_path):
+    from learning import review_log
+
+    path = tmp_path / "review_log.json"
+    review_log.write_log([{"question": "old"}], path)
+    before = path.read_bytes()
+    start, end = review_log.append_entries([{"question": "q1"}], path)
+    assert (start, end) == (0, review_log.journal_path(path).stat().st_size)
+    with review_log.journal_path(path).open("a") as f:
+        f.write('{"question": "cut sh')
+    review_log.append_entries([{"question": "q2"}], path)
+
+    assert path.read_bytes() == before
+    assert [e["question"] for e in review_log.read_log(path)] == ["old", "q1", "q2"]
+
+    version = review_log.version(path)
+    review_log.write_log(review_log.read_log(path), path)
+    assert not review_log.journal_path(path).exists()
+    assert [e["question"] for e in review_log.read_log(path)] == ["old", "q1", "q2"]
+    assert review_log.version(path) != version
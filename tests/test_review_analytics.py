@@ -0,0 +1,132 @@
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from learning import review_analytics as ra
+
+NOW = 1704931200  # 2024-01-11T00:00:00Z
+
+
+def _entry(day, question, correct, project="default"):
+    return {
+        "timestamp": f"2024-01-{day:02d}T12:00:00.000001Z",
+        "question": question,
+        "correct": correct,
+        "project": project,
+    }
+
+
+def test_compact_appends_only_new_entries(tmp_path):
+    log_path = tmp_path / "review_log.json"
+    store = tmp_path / "review_events.npz"
+    log = [_entry(1, "q1", True), _entry(2, "q2", False, "p2")]
+    log_path.write_text(json.dumps(log))
+
+    events = ra.compact(log_path, store)
+    assert len(events["ts"]) == 2
+    assert list(events["projects"]) == ["default", "p2"]
+
+    log.append(_entry(3, "q1", False))
+    log_path.write_text(json.dumps(log))
+    events = ra.compact(log_path, store)
+    assert len(events["ts"]) == 3
+    assert int(events["n_entries"]) == 3
+    assert events["correct"].tolist() == [True, False, False]
+
+
+def test_compute_stats_groups_by_card_day_and_interval(tmp_path):
+    log_path = tmp_path / "review_log.json"
+    log = [
+        _entry(1, "easy", True),
+        _entry(2, "easy", True),
+        _entry(1, "hard", True, "p2"),
+        _entry(2, "hard", False, "p2"),
+        _entry(6, "hard", False, "p2"),
+        _entry(10, "hard", True, "p2"),
+    ]
+    log_path.write_text(json.dumps(log))
+    stats = ra.compute_stats(ra.compact(log_path, tmp_path / "events.npz"), NOW)
+
+    assert stats["events"] == 6
+    assert stats["cards"] == 2
+    assert stats["lapses"] == 1
+    assert {p["project"]: p["accuracy"] for p in stats["projects"]} == {"default": 1.0, "p2": 0.5}
+    assert stats["daily"][0] == {"day": "2024-01-01", "attempts": 2, "accuracy": 1.0}
+    assert {r["interval"]: r["reviews"] for r in stats["retention"]} == {"1-2d": 2, "4-8d": 2}
+    assert stats["hardest"][0] == {"question": "hard", "attempts": 4, "accuracy": 0.5}
+    assert [c["question"] for c in stats["hardest_week"]] == ["hard"]
+
+
+def test_refresh_reuses_stats_until_log_changes(tmp_path):
+    log_path = tmp_path / "review_log.json"
+    log_path.write_text(json.dumps([_entry(1, "q", True)]))
+    stats_path = tmp_path / "stats.json"
+    first = ra.refresh(log_path, tmp_path / "events.npz", stats_path, now=NOW)
+    assert first["events"] == 1
+    stats_path.write_text(json.dumps({**first, "events": "cached"}))
+    assert ra.refresh(log_path, tmp_path / "events.npz", stats_path, now=NOW)["events"] == "cached"
+
+    log_path.write_text(json.dumps([_entry(1, "q", True), _entry(2, "q", False)]))
+    assert ra.refresh(log_path, tmp_path / "events.npz", stats_path, now=NOW)["events"] == 2
+
+
+def test_compact_skips_malformed_entries(tmp_path):
+    log_path = tmp_path / "review_log.json"
+    log = [
+        _entry(1, "q1", True),
+        {"question": "no time", "correct": True},
+        {"timestamp": "last tuesday", "question": "q2", "correct": False},
+        {"timestamp": 1704931200, "question": "q2", "correct": False},
+        "not an entry",
+        {"timestamp": "2024-01-02T13:00:00+01:00", "question": "q2", "correct": True},
+    ]
+    log_path.write_text(json.dumps(log))
+    events = ra.compact(log_path, tmp_path / "events.npz")
+
+    assert events["ts"].tolist() == [1704110400, 1704196800]
+    assert int(events["n_skipped"]) == 4
+    assert ra.compute_stats(events, NOW)["skipped"] == 4
+
+
+def test_refresh_recomputes_stale_week_window(tmp_path):
+    log_path = tmp_path / "review_log.json"
+    log_path.write_text(json.dumps([_entry(9, "hard", False), _entry(10, "hard", False)]))
+    store, stats_path = tmp_path / "events.npz", tmp_path / "stats.json"
+    assert ra.refresh(log_path, store, stats_path, now=NOW)["hardest_week"]
+
+    later = NOW + 30 * ra.DAY
+    assert ra.refresh(log_path, store, stats_path, now=later)["hardest_week"] == []
+
+
+def test_compact_reads_only_the_new_journal_lines(tmp_path, monkeypatch):
+    from learning import review_log
+
+    log_path = tmp_path / "review_log.json"
+    store = tmp_path / "events.npz"
+    review_log.write_log([_entry(1, "q1", True)], log_path)
+    review_log.append_entries([_entry(2, "q2", False)], log_path)
+    assert len(ra.compact(log_path, store)["ts"]) == 2
+
+    review_log.append_entries([_entry(3, "q1", False)], log_path)
+    monkeypatch.setattr(review_log, "read_base", lambda path: pytest.fail("log reread"))
+    offsets = []
+    read_journal = review_log.read_journal
+    monkeypatch.setattr(
+        review_log,
+        "read_journal",
+        lambda path, offset=0: offsets.append(offset) or read_journal(path, offset),
+    )
+    events = ra.compact(log_path, store)
+    assert events["correct"].tolist() == [True, False, False]
+    assert offsets and offsets[0] > 0
+    monkeypatch.undo()
+
+    # Folding the journal into the log keeps the count consistent.
+    review_log.write_log(review_log.read_log(log_path), log_path)
+    review_log.append_entries([_entry(4, "q3", True)], log_path)
+    events = ra.compact(log_path, store)
+    assert int(events["n_entries"]) == 4 and len(events["ts"]) == 4
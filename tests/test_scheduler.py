@@ -26,3 +26,45 @@ def test_build_queue_three_items():
         assert len(day_cards) == len(cards)
         assert all(date.fromisoformat(c["due_date"]) == due for c in day_cards)
 
+
+def test_apply_results_marks_reviewed_and_schedules_retry():
+    today = date(2024, 1, 1)
+    queue = ss.build_queue([{"question": "q1", "answer": "a1"}, {"question": "q2", "answer": "a2"}], today - ss.timedelta(days=1))
+    due = ss.pending_due(queue, today)
+    assert [c["question"] for c in due] == ["q1", "q2"]
+
+    results = [
+        {"card_id": ss.card_id(due[0]), "correct": True},
+        {"card_id": ss.card_id(due[1]), "correct": False},
+        {"card_id": "missing", "correct": True},
+    ]
+    applied = ss.apply_results(queue, results, today)
+    assert applied == [ss.card_id(due[0]), ss.card_id(due[1])]
+    assert ss.pending_due(queue, today) == []
+
+    retries = ss.pending_due(queue, today + ss.timedelta(days=1))
+    assert [c["question"] for c in retries] == ["q2"]
+
+    size = len(queue)
+    ss.apply_results(queue, results, today)
+    assert len(queue) == size
+
+
+def test_due_page_cursor_survives_results_between_pages():
+    today = date(2024, 1, 1)
+    cards = [{"question": f"q{i}", "answer": f"a{i}"} for i in range(5)]
+    queue = ss.build_queue(cards, today - ss.timedelta(days=1))
+
+    page, cursor, total = ss.due_page(queue, today, 0, 2)
+    assert [item["question"] for _, item in page] == ["q0", "q1"]
+    assert total == 5
+
+    # Submitting the first page must not make the next page skip cards.
+    ss.apply_results(queue, [{"card_id": item_id, "correct": True} for item_id, _ in page], today)
+    page, cursor, total = ss.due_page(queue, today, cursor, 2)
+    assert [item["question"] for _, item in page] == ["q2", "q3"]
+    assert total == 3
+
+    page, cursor, total = ss.due_page(queue, today, cursor, 2)
+    assert [item["question"] for _, item in page] == ["q4"]
+    assert cursor is None
@@ -0,0 +1,59 @@
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from utils import storage
+
+
+@pytest.mark.parametrize("codec,suffix", [("gzip", ".gz"), ("xz", ".xz"), ("none", "")])
+def test_round_trip_with_configured_codec(tmp_path, monkeypatch, codec, suffix):
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION", codec)
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION_LEVEL", "1")
+    path = tmp_path / "chunks.json"
+
+    assert storage.write_json(path, [{"text": "hello " * 100}]) == path
+    stored = tmp_path / f"chunks.json{suffix}"
+    assert storage.resolve(path) == stored and stored.exists()
+    assert storage.read_json(path) == [{"text": "hello " * 100}]
+    assert b"".join(storage.iter_stored(path)) == storage.read_bytes(path)
+    if suffix:
+        assert stored.stat().st_size < len(storage.read_bytes(path))
+
+
+def test_legacy_plain_files_and_rewrites(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION", "gzip")
+    path = tmp_path / "transcript.txt"
+    path.write_text("old transcript", encoding="utf-8")
+    assert storage.read_text(path) == "old transcript"
+    assert storage.glob(tmp_path, "*.txt") == [path]
+
+    storage.write_text(path, "new transcript")
+    assert not path.exists()
+    assert storage.resolve(path).name == "transcript.txt.gz"
+    assert storage.read_text(path) == "new transcript"
+    assert storage.glob(tmp_path, "*.txt") == [path]
+    assert storage.logical(storage.resolve(path)) == path
+
+
+def test_failed_write_keeps_previous_version(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION", "xz")
+    path = tmp_path / "notes.md"
+    storage.write_text(path, "keep me")
+    with pytest.raises(RuntimeError):
+        with storage.open_write(path) as f:
+            f.write(b"partial")
+            raise RuntimeError("boom")
+    assert storage.read_text(path) == "keep me"
+    assert [p.name for p in tmp_path.iterdir()] == ["notes.md.xz"]
+
+
+def test_invalid_settings_are_rejected(monkeypatch):
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION", "brotli")
+    with pytest.raises(ValueError):
+        storage.settings()
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION", "lzma")
+    monkeypatch.setenv("AUTODIDACT_COMPRESSION_LEVEL", "12")
+    with pytest.raises(ValueError):
+        storage.settings()
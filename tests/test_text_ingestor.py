@@ -0,0 +1,60 @@
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from ingestion import chunk_index, text_ingestor
+from utils import storage
+
+
+def test_markdown_sections_split_at_headings(tmp_path):
+    source = tmp_path / "notes.md"
+    source.write_text("intro line\n\n# First\n\nalpha\n\n## Second\nbeta\n", encoding="utf-8")
+
+    sections = [(t, bytes(v)) for t, v in text_ingestor.iter_section_views(source)]
+
+    assert sections == [("Preamble", b"intro line"), ("First", b"alpha"), ("Second", b"beta")]
+
+
+def test_long_sections_split_at_blank_lines():
+    buf = b"aa\n\nbb\n\ncc\ndd\n\ncccc dddd eeee\n\xc3\xa9\xc3\xa9\xc3\xa9\xc3\xa9\xc3\xa9"
+    spans = text_ingestor.section_spans(buf, markdown=False, max_bytes=8)
+    assert [buf[s:e] for _, s, e in spans] == [
+        b"aa\n\nbb",
+        b"cc\ndd",
+        b"cccc",
+        b"dddd",
+        b"eeee",
+        "\u00e9\u00e9\u00e9\u00e9".encode(),
+        "\u00e9".encode(),
+    ]
+    assert [t for t, _, _ in spans][:2] == ["Section 1", "Section 2"]
+
+
+def test_ingest_text_writes_sections(tmp_path, monkeypatch):
+    source = tmp_path / "dump.txt"
+    source.write_text("first para\n\nsecond para\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    output = text_ingestor.ingest_text(str(source), "proj")
+
+    assert output == Path("data") / "projects" / "proj" / "dump.md"
+    assert storage.read_text(output) == "# Section 1\n\nfirst para\n\nsecond para\n\n"
+    index = chunk_index.load_index(output)
+    assert chunk_index.read_section(output, index, 0) == "first para\n\nsecond para"
+    assert chunk_index.build_index(output) == index
+
+
+def test_empty_file_has_no_sections(tmp_path):
+    source = tmp_path / "empty.md"
+    source.write_bytes(b"")
+    assert list(text_ingestor.iter_section_views(source)) == []
+
+
+def test_headings_inside_code_fences_do_not_split():
+    buf = (
+        b"# Install\n\n```sh\n# clone first\ngit clone repo\n```\n\n"
+        b"~~~~python\n# comment\n```\n# still code\n~~~~\n\n## Usage\nrun it\n"
+    )
+    spans = text_ingestor.section_spans(buf, markdown=True)
+    assert [t for t, _, _ in spans] == ["Install", "Usage"]
+    assert b"# still code" in buf[spans[0][1] : spans[0][2]]
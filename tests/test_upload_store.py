@@ -0,0 +1,121 @@
+from pathlib import Path
+import hashlib
+import io
+import os
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from utils import upload_store
+
+
+def test_chunked_upload_resumes_and_commits(tmp_path):
+    payload = b"0123456789" * 1000
+    state = upload_store.create_upload(tmp_path, "video.mp4", "proj", len(payload))
+    upload_id = state["upload_id"]
+
+    upload_store.write_chunk(tmp_path, upload_id, 0, io.BytesIO(payload[:4000]))
+    with pytest.raises(upload_store.OffsetMismatch) as exc:
+        upload_store.write_chunk(tmp_path, upload_id, 0, io.BytesIO(payload[:10]))
+    assert exc.value.expected == 4000
+
+    # Simulate a restart: the in-memory hash state is lost.
+    upload_store._hashers.clear()
+    state = upload_store.write_chunk(tmp_path, upload_id, 4000, io.BytesIO(payload[4000:]))
+    assert state["offset"] == len(payload)
+
+    dest, digest = upload_store.commit_upload(
+        tmp_path, upload_id, hashlib.sha256(payload).hexdigest()
+    )
+    assert dest == tmp_path / "video.mp4"
+    assert dest.read_bytes() == payload
+    assert digest == hashlib.sha256(payload).hexdigest()
+    with pytest.raises(FileNotFoundError):
+        upload_store.get_upload(tmp_path, upload_id)
+
+
+def test_commit_rejects_incomplete_or_corrupt_upload(tmp_path):
+    state = upload_store.create_upload(tmp_path, "doc.pdf", size=4)
+    upload_id = state["upload_id"]
+    upload_store.write_chunk(tmp_path, upload_id, 0, io.BytesIO(b"ab"))
+    with pytest.raises(ValueError):
+        upload_store.commit_upload(tmp_path, upload_id)
+
+    upload_store.write_chunk(tmp_path, upload_id, 2, io.BytesIO(b"cd"))
+    with pytest.raises(ValueError):
+        upload_store.commit_upload(tmp_path, upload_id, "0" * 64)
+
+
+def test_unknown_upload_id_is_rejected(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        upload_store.get_upload(tmp_path, "../../etc/passwd")
+
+
+def test_slow_chunk_only_blocks_its_own_upload(tmp_path):
+    import threading
+
+    slow = upload_store.create_upload(tmp_path, "big.mp4")["upload_id"]
+    other = upload_store.create_upload(tmp_path, "small.pdf")["upload_id"]
+    started, release = threading.Event(), threading.Event()
+
+    class SlowStream:
+        def __init__(self):
+            self.sent = False
+
+        def read(self, n):
+            if self.sent:
+                return b""
+            started.set()
+            release.wait(5)
+            self.sent = True
+            return b"slow"
+
+    writer = threading.Thread(
+        target=upload_store.write_chunk, args=(tmp_path, slow, 0, SlowStream())
+    )
+    writer.start()
+    try:
+        assert started.wait(5)
+        # Other uploads are created, written and committed meanwhile.
+        upload_store.create_upload(tmp_path, "third.pdf")
+        upload_store.write_chunk(tmp_path, other, 0, io.BytesIO(b"fast"))
+        assert upload_store.commit_upload(tmp_path, other)[0].read_bytes() == b"fast"
+        # The same upload is refused rather than queued behind the slow chunk.
+        with pytest.raises(upload_store.UploadBusy):
+            upload_store.write_chunk(tmp_path, slow, 0, io.BytesIO(b"x"))
+    finally:
+        release.set()
+        writer.join(5)
+    assert upload_store.get_upload(tmp_path, slow)["offset"] == 4
+
+
+def test_stale_lock_from_dead_process_is_broken(tmp_path):
+    upload_id = upload_store.create_upload(tmp_path, "doc.pdf")["upload_id"]
+    part_path, _ = upload_store._paths(tmp_path, upload_id)
+    # PIDs are capped well below this, so no such process exists.
+    part_path.with_suffix(".lock").write_text("999999999")
+    upload_store.write_chunk(tmp_path, upload_id, 0, io.BytesIO(b"data"))
+    assert not part_path.with_suffix(".lock").exists()
+
+
+def test_unreadable_lock_counts_as_held(tmp_path):
+    upload_id = upload_store.create_upload(tmp_path, "doc.pdf")["upload_id"]
+    part_path, _ = upload_store._paths(tmp_path, upload_id)
+    lock_path = part_path.with_suffix(".lock")
+    # An empty lock is one being created, not an abandoned one.
+    lock_path.write_text("")
+    with pytest.raises(upload_store.UploadBusy):
+        upload_store.write_chunk(tmp_path, upload_id, 0, io.BytesIO(b"data"))
+    assert lock_path.exists()
+
+
+def test_release_keeps_a_lock_taken_over_by_someone_else(tmp_path):
+    upload_id = upload_store.create_upload(tmp_path, "doc.pdf")["upload_id"]
+    part_path, _ = upload_store._paths(tmp_path, upload_id)
+    lock_path = part_path.with_suffix(".lock")
+    with upload_store._upload_lock(part_path):
+        assert upload_store._lock_owner(lock_path.read_text()) == os.getpid()
+        lock_path.write_text(f"{os.getpid()} someone-else")
+    assert lock_path.read_text() == f"{os.getpid()} someone-else"
+    assert not list(part_path.parent.glob("*.tmp")) and not list(part_path.parent.glob("*.stale"))
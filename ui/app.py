@@ -1,51 +1,99 @@
-import threading
 from datetime import date, datetime
 from pathlib import Path
 import json
+import math
+import mimetypes
 from flask import (
     Flask,
+    Response,
     render_template,
     request,
     redirect,
     url_for,
     flash,
+    abort,
+    send_file,
     send_from_directory,
 )
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
 import sys
+import threading
+import uuid
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(BASE_DIR))
 
-from learning import spaced_scheduler, flashcard_gen
-from utils import focus_timer, summary_writer
-from videos import video_manager
-from ingestion import document_ingestor, video_ingestor
+from learning import answer_grader, spaced_scheduler, flashcard_gen, related_index, review_log
+from utils import (
+    focus_rollup,
+    focus_scheduler,
+    focus_timer,
+    http_cache,
+    storage,
+    summary_writer,
+    upload_store,
+)
+from videos import clip_store, video_manager
+from ingestion import chunk_index, registry
 FLASHCARDS_PATH = BASE_DIR / "flashcards.json"
 CURRICULUM_PATH = BASE_DIR / "curriculum" / "curriculum.json"
 DATA_DIR = BASE_DIR / "data"
 UPLOAD_DIR = DATA_DIR / "uploads"
 QUEUE_PATH = BASE_DIR / "spaced_review_queue.json"
 FOCUS_LOG_PATH = BASE_DIR / "focus_log.json"
+FOCUS_SESSIONS_PATH = BASE_DIR / "focus_sessions.json"
+FOCUS_ROLLUP_PATH = BASE_DIR / "focus_rollup.json"
 CLIPS_PATH = BASE_DIR / "video_clips.json"
+CLIPS_DIR = BASE_DIR / "video_clips"
 REVIEW_LOG_PATH = BASE_DIR / "review_log.json"
+REVIEW_EVENTS_PATH = BASE_DIR / "review_events.npz"
+REVIEW_STATS_PATH = BASE_DIR / "review_stats.json"
+RELATED_INDEX_PATH = DATA_DIR / "related_index.json"
+RELATED_INDEX_DIR = DATA_DIR / "related_index"
+REVIEW_PAGE_LIMIT = 500
+RELATED_CARD_LIMIT = 20
+RELATED_LINKS = 3
+
+_review_lock = threading.Lock()
+_related_lock = threading.Lock()
+_related = None
+_related_version = 0
+_related_save_lock = threading.Lock()
+_related_saved: dict = {}
+_clips_lock = threading.Lock()
+_clips = None
+_card_projects_cache: tuple = (None, {})
+_result_ids_cache: tuple = (None, set())
 
 app = Flask(__name__)
 app.secret_key = "autodidact"  # simple session key
 
 @app.route("/")
 def index():
-    return render_template("index.html")
+    return render_template("index.html", accept=",".join(registry.supported_extensions()))
 
 
 @app.route("/videos")
+@http_cache.conditional(lambda: video_manager.library_sources())
 def video_library():
     videos = video_manager.list_videos()
     return render_template("video_library.html", videos=videos)
 
 
+def _play_sources() -> list:
+    name = request.args.get("video")
+    return video_manager.metadata_sources(name) if name else []
+
+
 @app.route("/play")
+@http_cache.conditional(_play_sources, compress=True)
 def play_video():
     name = request.args.get("video")
     if not name:
@@ -59,70 +107,226 @@ def play_video():
 
 @app.route("/video/<path:filename>")
 def video_file(filename: str):
-    return send_from_directory(DATA_DIR, filename)
+    """Serve a file from the data directory, including compressed transcripts.
+
+    A ``.gz`` copy is sent as-is with ``Content-Encoding: gzip`` to clients
+    that accept it; otherwise the decompressed text is streamed.
+    """
+    path = safe_join(str(DATA_DIR), filename)
+    if path is None:
+        abort(404)
+    stored = storage.resolve(path)
+    codec = storage.codec_of(stored)
+    if codec == "none":
+        return send_from_directory(DATA_DIR, filename)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if codec == "gzip" and "gzip" in request.accept_encodings:
+        resp = send_file(stored, mimetype=mimetype, conditional=True)
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp = Response(storage.iter_stored(path), mimetype=mimetype)
+    resp.vary.add("Accept-Encoding")
+    return resp
 
 @app.route("/curriculum")
+@http_cache.conditional(lambda: [CURRICULUM_PATH])
 def curriculum():
     if not CURRICULUM_PATH.exists():
         return "Curriculum not found", 404
     data = json.loads(CURRICULUM_PATH.read_text())
     return render_template("curriculum.html", curriculum=data)
 
+def _process_upload(dest: Path, project: str) -> tuple[list[str], str, int]:
+    """Run ingestion, summary and flashcard generation for an uploaded file."""
+    paths = []
+    summary = ""
+    flashcard_count = 0
+
+    ingest, kind = registry.get_ingestor(dest.suffix)
+
+    if kind == "document":
+        output = ingest(str(dest), project)
+        app.logger.info(f"Document ingested to {output}")
+        paths.append(str(output))
+
+        doc_index = chunk_index.ensure_index(Path(output))
+        summary = summary_writer.generate_summary(chunk_index.iter_chunks(Path(output), doc_index))
+        summary_path = Path(output).parent / "summary.json"
+        storage.write_json(summary_path, {"summary": summary})
+        paths.append(str(summary_path))
+
+        sections = chunk_index.iter_sections(Path(output), doc_index)
+        cards = flashcard_gen.generate_flashcards(text for _, text in sections)
+        flashcards_path = storage.write_json(Path(output).parent / "flashcards.json", cards)
+        flashcard_count = len(cards)
+        paths.append(str(flashcards_path))
+    elif kind == "video":
+        t_path, c_path = ingest(str(dest), project)
+        app.logger.info(f"Video processed: {t_path}, {c_path}")
+        paths.extend([str(t_path), str(c_path)])
+
+        transcript_text = storage.read_text(t_path)
+        summary = summary_writer.generate_summary(transcript_text)
+        summary_path = Path(t_path).parent / "summary.json"
+        storage.write_json(summary_path, {"summary": summary})
+        paths.append(str(summary_path))
+
+        flashcards_path = flashcard_gen.generate_flashcards_from_transcript(c_path, project)
+        paths.append(str(flashcards_path))
+        try:
+            flashcard_count = len(storage.read_json(flashcards_path))
+        except Exception:
+            flashcard_count = 0
+    else:
+        raise ValueError(f"Unknown ingestor kind: {kind}")
+
+    _update_related(project, Path(paths[0]).parent)
+    return paths, summary, flashcard_count
+
+
+def _related_index() -> related_index.RelatedIndex:
+    """Return the shared related-material index; callers hold ``_related_lock``.
+
+    Projects reindexed by other workers since the last call are reloaded.
+    """
+    global _related
+    if _related is None:
+        _related = related_index.IndexStore(RELATED_INDEX_DIR)
+        _related.import_legacy(RELATED_INDEX_PATH)
+    _related.refresh()
+    return _related.index
+
+
+def _update_related(project: str, project_dir: Path) -> None:
+    """Reindex *project* and persist its items.
+
+    Only the in-memory update and a snapshot of the project happen under
+    ``_related_lock``; its file is written afterwards so queries are not
+    blocked on it, and a snapshot older than the one already written is
+    dropped.
+    """
+    global _related_version
+    with _related_lock:
+        index = _related_index()
+        count = related_index.index_project(index, project, project_dir)
+        _related_version += 1
+        version = _related_version
+        snapshot = index.snapshot(project)
+    with _related_save_lock:
+        if version > _related_saved.get(project, 0):
+            _related.write(project, snapshot)
+            _related_saved[project] = version
+    app.logger.info(f"Indexed {count} related items for project {project}")
+
+
+def _related_links(text: str) -> list[dict]:
+    """Return links to the document sections and transcript chunks closest to *text*."""
+    with _related_lock:
+        hits = _related_index().query(text, k=RELATED_LINKS, kinds=("section", "chunk"))
+    links = []
+    for score, _, meta in hits:
+        if meta["kind"] == "section":
+            url = url_for(
+                "source_section", project=meta["project"], doc=meta["doc"], section_id=meta["section"]
+            )
+        else:
+            url = url_for("source_transcript", project=meta["project"]) + f"#chunk-{meta['chunk']}"
+        links.append({"url": url, "label": meta.get("label", ""), "score": score})
+    return links
+
+
+def _project_name(project: str | None) -> str:
+    """Return the directory-safe form of a user-supplied project name.
+
+    Applied once when an upload starts, so ingestion writes to the same
+    directory that ``_project_dir`` and the source routes look in.
+    """
+    return secure_filename(project or "") or "default"
+
+
+def _project_dir(project: str) -> Path:
+    return DATA_DIR / "projects" / _project_name(project)
+
+
+def _card_project(question: str) -> str:
+    """Return the project whose flashcards contain *question*.
+
+    The question-to-project map is rebuilt only when a project's deck
+    changes. Unknown questions belong to ``default``.
+    """
+    global _card_projects_cache
+    decks = storage.glob(DATA_DIR / "projects", "*/flashcards.json")
+    key = []
+    for deck in decks:
+        try:
+            key.append((str(deck), storage.resolve(deck).stat().st_mtime_ns))
+        except FileNotFoundError:
+            continue
+    key = tuple(key)
+    cached_key, projects = _card_projects_cache
+    if cached_key != key:
+        projects = {}
+        for deck in decks:
+            try:
+                cards = storage.read_json(deck)
+            except (OSError, json.JSONDecodeError):
+                continue
+            for card in cards if isinstance(cards, list) else []:
+                if isinstance(card, dict) and card.get("question"):
+                    projects.setdefault(card["question"], deck.parent.name)
+        _card_projects_cache = (key, projects)
+    return projects.get(question, "default")
+
+
+@app.route("/projects/<project>/docs/<doc>/sections/<int:section_id>")
+def source_section(project: str, doc: str, section_id: int):
+    md_path = _project_dir(project) / f"{secure_filename(doc)}.md"
+    if not storage.exists(md_path):
+        return "Document not found", 404
+    doc_index = chunk_index.ensure_index(md_path)
+    if section_id >= len(doc_index["sections"]):
+        return "Section not found", 404
+    section = doc_index["sections"][section_id]
+    return render_template(
+        "source.html",
+        title=f"{doc}: {section['title']}",
+        blocks=[{"id": f"section-{section_id}", "heading": section["title"],
+                 "text": chunk_index.read_section(md_path, doc_index, section_id)}],
+    )
+
+
+@app.route("/projects/<project>/transcript")
+def source_transcript(project: str):
+    chunks_path = _project_dir(project) / "transcript_chunks.json"
+    try:
+        chunks = storage.read_json(chunks_path)
+    except (OSError, json.JSONDecodeError):
+        return "Transcript not found", 404
+    blocks = [
+        {"id": f"chunk-{n}", "heading": f"{float(chunk.get('start', 0)):.0f}s",
+         "text": chunk.get("text", "")}
+        for n, chunk in enumerate(chunks)
+    ]
+    return render_template("source.html", title=f"{project} transcript", blocks=blocks)
+
+
 @app.route("/upload", methods=["POST"])
 def upload():
     file = request.files.get("file")
-    project = request.form.get("project") or "default"
+    project = _project_name(request.form.get("project"))
     if not file or file.filename == "":
         flash("No file selected")
         return redirect(url_for("index"))
 
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
     dest = UPLOAD_DIR / secure_filename(file.filename)
+    if not registry.is_supported(dest.suffix):
+        flash("Unsupported file type")
+        return redirect(url_for("index"))
     file.save(dest)
 
-    paths = []
-    summary = ""
-    flashcard_count = 0
-
-    ext = dest.suffix.lower()
-
     try:
-        if ext in {".pdf", ".epub"}:
-            output = document_ingestor.ingest_document(str(dest), project)
-            app.logger.info(f"Document ingested to {output}")
-            paths.append(str(output))
-
-            text = Path(output).read_text(encoding="utf-8")
-            summary = summary_writer.generate_summary(text)
-            summary_path = Path(output).parent / "summary.json"
-            summary_path.write_text(json.dumps({"summary": summary}, indent=2), encoding="utf-8")
-            paths.append(str(summary_path))
-
-            cards = flashcard_gen.generate_flashcards(text)
-            flashcards_path = Path(output).parent / "flashcards.json"
-            flashcards_path.write_text(json.dumps(cards, indent=2), encoding="utf-8")
-            flashcard_count = len(cards)
-            paths.append(str(flashcards_path))
-        elif ext == ".mp4":
-            t_path, c_path = video_ingestor.ingest_video(str(dest), project)
-            app.logger.info(f"Video processed: {t_path}, {c_path}")
-            paths.extend([str(t_path), str(c_path)])
-
-            transcript_text = Path(t_path).read_text(encoding="utf-8")
-            summary = summary_writer.generate_summary(transcript_text)
-            summary_path = Path(t_path).parent / "summary.json"
-            summary_path.write_text(json.dumps({"summary": summary}, indent=2), encoding="utf-8")
-            paths.append(str(summary_path))
-
-            flashcards_path = flashcard_gen.generate_flashcards_from_transcript(c_path, project)
-            paths.append(str(flashcards_path))
-            try:
-                flashcard_count = len(json.loads(Path(flashcards_path).read_text()))
-            except Exception:
-                flashcard_count = 0
-        else:
-            flash("Unsupported file type")
-            return redirect(url_for("index"))
+        paths, summary, flashcard_count = _process_upload(dest, project)
     except Exception as e:
         app.logger.exception("Error processing upload")
         flash(str(e))
@@ -136,13 +340,120 @@ def upload():
         flashcard_count=flashcard_count,
     )
 
+
+@app.route("/uploads", methods=["POST"])
+def create_upload():
+    """Start a chunked upload; send data with ``PUT /uploads/<id>``."""
+    data = request.get_json(force=True, silent=True) or {}
+    filename = secure_filename(data.get("filename") or "")
+    if not filename:
+        return {"error": "Missing filename"}, 400
+    if not registry.is_supported(Path(filename).suffix):
+        return {"error": "Unsupported file type"}, 400
+    size = data.get("size")
+    if size is not None and (not isinstance(size, int) or size < 0):
+        return {"error": "Invalid size"}, 400
+    state = upload_store.create_upload(
+        UPLOAD_DIR, filename, _project_name(data.get("project")), size
+    )
+    return state, 201
+
+
+@app.route("/uploads/<upload_id>", methods=["GET"])
+def upload_status(upload_id: str):
+    try:
+        return upload_store.get_upload(UPLOAD_DIR, upload_id)
+    except FileNotFoundError:
+        return {"error": "Upload not found"}, 404
+
+
+@app.route("/uploads/<upload_id>", methods=["PUT"])
+def upload_chunk(upload_id: str):
+    """Append the request body at the ``Upload-Offset`` header (or ``?offset=``)."""
+    offset = request.headers.get("Upload-Offset", request.args.get("offset"))
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        return {"error": "Missing offset"}, 400
+    try:
+        state = upload_store.write_chunk(UPLOAD_DIR, upload_id, offset, request.stream)
+    except FileNotFoundError:
+        return {"error": "Upload not found"}, 404
+    except upload_store.OffsetMismatch as e:
+        return {"error": str(e), "offset": e.expected}, 409
+    except upload_store.UploadBusy as e:
+        return {"error": str(e)}, 409
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return state
+
+
+@app.route("/uploads/<upload_id>/commit", methods=["POST"])
+def commit_upload(upload_id: str):
+    """Finish an upload, verify its hash and run the usual ingestion."""
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        state = upload_store.get_upload(UPLOAD_DIR, upload_id)
+        dest, digest = upload_store.commit_upload(UPLOAD_DIR, upload_id, data.get("sha256"))
+    except FileNotFoundError:
+        return {"error": "Upload not found"}, 404
+    except upload_store.UploadBusy as e:
+        return {"error": str(e)}, 409
+    except ValueError as e:
+        return {"error": str(e)}, 409
+    try:
+        paths, summary, flashcard_count = _process_upload(dest, _project_name(state["project"]))
+    except Exception as e:
+        app.logger.exception("Error processing upload")
+        return {"error": str(e), "uploaded": str(dest), "sha256": digest}, 422
+    return {
+        "uploaded": str(dest),
+        "sha256": digest,
+        "paths": paths,
+        "summary": summary,
+        "flashcard_count": flashcard_count,
+    }
+
 @app.route("/flashcards")
+@http_cache.conditional(lambda: [QUEUE_PATH, date.today().isoformat()])
 def flashcards():
     queue = spaced_scheduler.read_queue(QUEUE_PATH)
     cards = spaced_scheduler.due_today(queue, date.today())
     return render_template("flashcards.html", cards=cards)
 
 
+def _logged_result_ids() -> set:
+    """Return the result IDs in the review log; callers hold ``_review_lock``.
+
+    The log is only reread when it changed behind our back; entries added
+    through :func:`_log_results` update the cached set directly.
+    """
+    global _result_ids_cache
+    version = review_log.version(REVIEW_LOG_PATH)
+    cached_version, ids = _result_ids_cache
+    if cached_version != version:
+        ids = {e["result_id"] for e in review_log.read_log(REVIEW_LOG_PATH) if e.get("result_id")}
+        _result_ids_cache = (version, ids)
+    return ids
+
+
+def _log_results(entries: list) -> None:
+    """Append *entries* to the review log; callers hold ``_review_lock``.
+
+    The cached IDs stay valid only if our entries are the sole change to the
+    log since they were read; if another process wrote in between, the
+    cache is marked stale so the next lookup rereads the log.
+    """
+    global _result_ids_cache
+    ids = _logged_result_ids()
+    before = _result_ids_cache[0]
+    start, end = review_log.append_entries(entries, REVIEW_LOG_PATH)
+    after = review_log.version(REVIEW_LOG_PATH)
+    ids.update(e["result_id"] for e in entries if e.get("result_id"))
+    in_sync = after[:2] == before[:2] and max(before[3], 0) == start and after[3] == end
+    _result_ids_cache = (after if in_sync else None, ids)
+
+
 @app.route("/review", methods=["GET", "POST"])
 def review():
     """Daily review interface showing flashcards due today."""
@@ -152,47 +463,176 @@ def review():
         question = request.form.get("question", "")
         result = request.form.get("result", "incorrect")
         correct = result == "correct"
-        entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "question": question,
-            "correct": correct,
-        }
-        if REVIEW_LOG_PATH.exists():
-            try:
-                log = json.loads(REVIEW_LOG_PATH.read_text())
-            except json.JSONDecodeError:
-                log = []
-        else:
-            log = []
-        log.append(entry)
-        REVIEW_LOG_PATH.write_text(json.dumps(log, indent=2), encoding="utf-8")
+        with _review_lock:
+            _log_results([review_log.make_entry(question, correct, project=_card_project(question))])
         flash("Result logged")
         return redirect(url_for("review"))
 
-    return render_template("review.html", cards=cards)
+    related = [
+        _related_links(f"{card['question']} {card.get('answer', '')}")
+        for card in cards[:RELATED_CARD_LIMIT]
+    ]
+    return render_template("review.html", cards=cards, related=related)
+
+
+def _json_response(payload, status: int = 200) -> Response:
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(",", ":"))
+    return Response(body, status=status, mimetype="application/json")
+
+
+def _json_body():
+    data = request.get_data(cache=False)
+    if not data:
+        return None
+    try:
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    except ValueError:
+        return None
+
+
+@app.route("/api/review/due")
+def api_review_due():
+    """Return unreviewed cards due today, ``limit`` at a time from ``cursor``."""
+    try:
+        cursor = int(request.args.get("cursor", 0))
+        limit = min(int(request.args.get("limit", 50)), REVIEW_PAGE_LIMIT)
+    except ValueError:
+        return _json_response({"error": "cursor and limit must be integers"}, 400)
+    if cursor < 0 or limit < 1:
+        return _json_response({"error": "Invalid cursor or limit"}, 400)
+
+    queue = spaced_scheduler.read_queue(QUEUE_PATH)
+    page, next_cursor, total = spaced_scheduler.due_page(queue, date.today(), cursor, limit)
+    cards = [
+        {
+            "id": item_id,
+            "question": item.get("question", ""),
+            "answer": item.get("answer", ""),
+            "due_date": item.get("due_date"),
+        }
+        for item_id, item in page
+    ]
+    return _json_response(
+        {
+            "cards": cards,
+            "total": total,
+            "next_cursor": str(next_cursor) if next_cursor is not None else None,
+        }
+    )
+
+
+@app.route("/api/review/results", methods=["POST"])
+def api_review_results():
+    """Apply a batch of review outcomes to the log and schedule at once.
+
+    Body: ``{"results": [{"id": ..., "card_id": ..., "correct": bool}]}``.
+    ``id`` is generated by the client; results whose ID is already in the
+    log are skipped, so a client can safely resend a buffered batch.
+    """
+    data = _json_body()
+    results = data.get("results") if isinstance(data, dict) else None
+    if not isinstance(results, list):
+        return _json_response({"error": "Expected a 'results' list"}, 400)
+    for result in results:
+        if not isinstance(result, dict) or not result.get("id") or not result.get("card_id"):
+            return _json_response({"error": "Each result needs 'id' and 'card_id'"}, 400)
+        if not isinstance(result.get("correct"), bool):
+            return _json_response({"error": "'correct' must be true or false"}, 400)
+        if "timestamp" in result:
+            try:
+                result["timestamp"] = review_log.normalize_timestamp(result["timestamp"])
+            except ValueError:
+                return _json_response({"error": "'timestamp' must be an ISO-8601 string"}, 400)
+
+    today = date.today()
+    with _review_lock:
+        seen = set(_logged_result_ids())
+        fresh = []
+        for result in results:
+            if result["id"] not in seen:
+                seen.add(result["id"])
+                fresh.append(result)
+
+        queue = spaced_scheduler.read_queue(QUEUE_PATH)
+        by_id = {spaced_scheduler.card_id(item): item for item in queue}
+        applied = set(spaced_scheduler.apply_results(queue, fresh, today))
+        unknown = [r["card_id"] for r in fresh if r["card_id"] not in applied]
+        if applied:
+            spaced_scheduler.write_queue(queue, QUEUE_PATH)
+
+        entries = []
+        for result in fresh:
+            item = by_id.get(result["card_id"])
+            if item is None:
+                continue
+            entry = review_log.make_entry(
+                item.get("question", ""),
+                result["correct"],
+                card_id=result["card_id"],
+                project=item.get("project") or _card_project(item.get("question", "")),
+                result_id=result["id"],
+            )
+            if "timestamp" in result:
+                entry["timestamp"] = result["timestamp"]
+            entries.append(entry)
+        if entries:
+            _log_results(entries)
+
+    return _json_response(
+        {
+            "applied": len(entries),
+            "duplicates": len(results) - len(fresh),
+            "unknown": unknown,
+        }
+    )
+
+
+def _dashboard_sources() -> list:
+    # DATA_DIR's own mtime changes when documents or videos are added.
+    return [
+        DATA_DIR,
+        FLASHCARDS_PATH,
+        FOCUS_LOG_PATH,
+        FOCUS_ROLLUP_PATH,
+        date.today().isoformat(),
+    ]
 
 
 @app.route("/dashboard")
+@http_cache.conditional(_dashboard_sources)
 def dashboard():
-    docs = list(DATA_DIR.glob("*.md"))
+    docs = storage.glob(DATA_DIR, "*.md")
     videos = list(DATA_DIR.glob("*.mp4"))
     try:
         flashcards = json.loads(FLASHCARDS_PATH.read_text()) if FLASHCARDS_PATH.exists() else []
     except json.JSONDecodeError:
         flashcards = []
-    try:
-        focus_log = json.loads(FOCUS_LOG_PATH.read_text()) if FOCUS_LOG_PATH.exists() else []
-    except json.JSONDecodeError:
-        focus_log = []
+    rollup = focus_rollup.load_current(FOCUS_LOG_PATH, FOCUS_ROLLUP_PATH)
+    week = focus_rollup.heatmap(rollup, date.today(), days=7)
     metrics = {
         "docs": len(docs),
         "videos": len(videos),
         "flashcards": len(flashcards),
-        "focus_sessions": len(focus_log),
+        "focus_sessions": rollup["totals"]["sessions"],
+        "focus_minutes_week": sum(minutes for _, minutes in week),
+        "streak": focus_rollup.current_streak(rollup),
     }
     return render_template("dashboard.html", metrics=metrics)
 
 
+@app.route("/stats")
+def stats():
+    """Review statistics from the precomputed columnar aggregates."""
+    # NumPy is only imported by workers that serve this page.
+    from learning import review_analytics
+
+    data = review_analytics.refresh(REVIEW_LOG_PATH, REVIEW_EVENTS_PATH, REVIEW_STATS_PATH)
+    return render_template("stats.html", stats=data)
+
+
 @app.route("/generate_flashcards")
 def generate_flashcards_route():
     video = request.args.get("video")
@@ -200,71 +640,73 @@ def generate_flashcards_route():
         return {"error": "Missing video"}, 400
 
     transcript_path = DATA_DIR / f"{video}.transcript.json"
-    if not transcript_path.exists():
+    if not storage.exists(transcript_path):
         return {"error": "Transcript not found"}, 404
 
     out_path = flashcard_gen.generate_flashcards_from_transcript(transcript_path)
     return {"flashcards": str(out_path)}
 
-def _run_focus(minutes: int, session_type: str, project_id: str) -> None:
-    start = datetime.utcnow()
-    focus_timer.countdown(minutes)
-    end = datetime.utcnow()
-    focus_timer.log_session(start, end, session_type, project_id, FOCUS_LOG_PATH)
+def _log_focus_session(session: focus_scheduler.FocusSession) -> None:
+    start = datetime.utcfromtimestamp(session.start)
+    end = datetime.utcfromtimestamp(session.deadline)
+    focus_timer.log_session(
+        start, end, session.session_type, session.project_id, FOCUS_LOG_PATH, FOCUS_ROLLUP_PATH
+    )
+
 
+focus_sessions = focus_scheduler.FocusScheduler(FOCUS_SESSIONS_PATH, _log_focus_session)
+focus_sessions_owner = None
 
-def _calculate_streak(log: list[dict]) -> int:
-    streak = 0
-    last_date = None
-    for entry in reversed(log):
+
+@app.before_request
+def _start_focus_scheduler() -> None:
+    # Started on first request so the debug reloader's parent never runs it.
+    # The scheduler owns focus_sessions.json, so run the app with a single
+    # worker process; extra workers log a warning and refuse new sessions.
+    global focus_sessions_owner
+    if focus_sessions_owner is not False:
         try:
-            start_date = datetime.fromisoformat(entry["start"].replace("Z", "")).date()
-        except Exception:
-            continue
-        if last_date is None:
-            streak = 1
-            last_date = start_date
-            continue
-        diff = (last_date - start_date).days
-        if diff == 0:
-            continue
-        if diff == 1:
-            streak += 1
-            last_date = start_date
-        else:
-            break
-    return streak
-    
+            focus_sessions.start()
+            focus_sessions_owner = True
+        except RuntimeError as e:
+            app.logger.warning(str(e))
+            focus_sessions_owner = False
+
+
 @app.route("/focus", methods=["POST"])
 def focus():
+    if focus_sessions_owner is False:
+        # Only the owning process may write the session state.
+        return {"error": "Focus sessions are handled by another worker"}, 503
     minutes = int(request.form.get("minutes", 25))
     session_type = request.form.get("session_type", "read")
     project_id = request.form.get("project_id", "default")
-    threading.Thread(
-        target=_run_focus,
-        args=(minutes, session_type, project_id),
-        daemon=True,
-    ).start()
+    session = focus_sessions.add(minutes, session_type, project_id)
+    if request.accept_mimetypes.best == "application/json":
+        return focus_sessions.status(session.session_id), 201
     flash(
         f"Started a {minutes} minute {session_type} session for project {project_id}"
     )
     return redirect(url_for("index"))
 
 
+@app.route("/focus/<session_id>")
+def focus_status(session_id: str):
+    status = focus_sessions.status(session_id)
+    if status is None:
+        return {"error": "Session not found"}, 404
+    return status
+
+
 @app.route("/session_summary", methods=["GET", "POST"])
 def session_summary():
     if not FOCUS_LOG_PATH.exists():
         return "No sessions", 404
-    try:
-        log = json.loads(FOCUS_LOG_PATH.read_text())
-        if not isinstance(log, list):
-            log = []
-    except json.JSONDecodeError:
-        log = []
-    if not log:
+    rollup = focus_rollup.load_current(FOCUS_LOG_PATH, FOCUS_ROLLUP_PATH)
+    last = rollup.get("last_session")
+    if not last:
         return "No sessions", 404
-    last = log[-1]
-    streak = _calculate_streak(log)
+    streak = focus_rollup.current_streak(rollup)
     total_time = last.get("session_length")
     session_type = last.get("session_type", "")
     project_id = last.get("project_id", "default")
@@ -275,9 +717,9 @@ def session_summary():
         out_dir = DATA_DIR / "projects" / project_id
         out_dir.mkdir(parents=True, exist_ok=True)
         ref_path = out_dir / "reflections.json"
-        if ref_path.exists():
+        if storage.exists(ref_path):
             try:
-                reflections = json.loads(ref_path.read_text())
+                reflections = storage.read_json(ref_path)
                 if not isinstance(reflections, list):
                     reflections = []
             except json.JSONDecodeError:
@@ -292,7 +734,7 @@ def session_summary():
                 "revisit": revisit,
             }
         )
-        ref_path.write_text(json.dumps(reflections, indent=2), encoding="utf-8")
+        storage.write_json(ref_path, reflections)
         flash("Reflection saved")
         return redirect(url_for("index"))
 
@@ -305,52 +747,54 @@ def session_summary():
     )
 
 
+def _clip_store() -> clip_store.ClipStore:
+    """Return the clip store, importing the legacy clip list on first use."""
+    global _clips
+    with _clips_lock:
+        if _clips is None:
+            store = clip_store.ClipStore(CLIPS_DIR)
+            imported = store.import_legacy(CLIPS_PATH)
+            if imported:
+                app.logger.info(f"Imported {imported} clips from {CLIPS_PATH}")
+            _clips = store
+        return _clips
+
+
 @app.route("/clip", methods=["POST"])
 def save_clip():
     data = request.get_json(force=True, silent=True) or {}
     video = data.get("video")
-    start = data.get("start")
-    end = data.get("end")
-    if not video or start is None or end is None:
+    if not video or data.get("start") is None or data.get("end") is None:
         return {"error": "Missing parameters"}, 400
-    if CLIPS_PATH.exists():
-        try:
-            clips = json.loads(CLIPS_PATH.read_text())
-        except json.JSONDecodeError:
-            clips = []
-    else:
-        clips = []
-    clips.append({"video": video, "start": start, "end": end})
-    CLIPS_PATH.write_text(json.dumps(clips, indent=2), encoding="utf-8")
-    return {"status": "saved"}
+    try:
+        start = clip_store.parse_time(data["start"])
+        end = clip_store.parse_time(data["end"])
+    except ValueError:
+        return {"error": "start and end must be non-negative, finite numbers"}, 400
+    start, end = _clip_store().add(video, start, end)
+    return {"status": "saved", "clip": {"start": start, "end": end}}
 
-@app.route("/review", methods=["GET", "POST"])
-def review():
-    """Daily review interface showing flashcards due today."""
-    cards = spaced_scheduler.get_due_flashcards()
 
-    if request.method == "POST":
-        question = request.form.get("question", "")
-        result = request.form.get("result", "incorrect")
-        correct = result == "correct"
-        entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "question": question,
-            "correct": correct,
-        }
-        if REVIEW_LOG_PATH.exists():
-            try:
-                log = json.loads(REVIEW_LOG_PATH.read_text())
-            except json.JSONDecodeError:
-                log = []
-        else:
-            log = []
-        log.append(entry)
-        REVIEW_LOG_PATH.write_text(json.dumps(log, indent=2), encoding="utf-8")
-        flash("Result logged")
-        return redirect(url_for("review"))
+@app.route("/clips")
+def list_clips():
+    """Return the clips of ``video`` overlapping ``start``..``end`` seconds.
+
+    Without ``end`` the window runs to the end of the video.
+    """
+    video = request.args.get("video")
+    if not video:
+        return {"error": "Missing video"}, 400
+    try:
+        start = clip_store.parse_time(request.args.get("start", 0))
+        end = request.args.get("end")
+        end = math.inf if end is None else clip_store.parse_time(end)
+    except ValueError:
+        return {"error": "start and end must be non-negative, finite numbers"}, 400
+    if end < start:
+        return {"error": "end must not be before start"}, 400
+    clips = _clip_store().overlapping(video, start, end)
+    return {"video": video, "clips": [{"start": s, "end": e} for s, e in clips]}
 
-    return render_template("review.html", cards=cards)
 @app.route("/quiz", methods=["GET", "POST"])
 def quiz():
     """Simple flashcard quiz interface."""
@@ -369,12 +813,30 @@ def quiz():
     user_answer = ""
     correct_answer = ""
     next_index = index + 1 if (index + 1) < len(cards) else None
+    related = []
+    result = None
+    # Identifies this attempt, so a resubmitted form is only logged once.
+    result_id = request.form.get("result_id") or uuid.uuid4().hex
 
     if request.method == "POST":
         show_answer = True
         user_answer = request.form.get("answer", "")
         if question is not None:
             correct_answer = cards[index].get("answer", "")
+            related = _related_links(f"{question} {correct_answer}")
+            result = answer_grader.grade(user_answer, correct_answer)
+            entry = review_log.make_entry(
+                question,
+                result["verdict"] == "correct",
+                project=_card_project(question),
+                source="quiz",
+                score=result["score"],
+                verdict=result["verdict"],
+                result_id=result_id,
+            )
+            with _review_lock:
+                if result_id not in _logged_result_ids():
+                    _log_results([entry])
 
     return render_template(
         "quiz.html",
@@ -384,6 +846,9 @@ def quiz():
         user_answer=user_answer,
         correct_answer=correct_answer,
         next_index=next_index,
+        related=related,
+        result=result,
+        result_id=result_id,
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,198 @@
+"""Per-day rollups of the focus session log.
+
+``focus_log.json`` is append-only and grows with every session. This module
+keeps a small companion file with one bucket per day (overall and per
+project) plus a cached current streak, updated as each session is logged,
+so summaries no longer need to re-scan and re-parse the whole log.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+def empty_rollup() -> Dict:
+    return {
+        "days": {},
+        "projects": {},
+        "totals": {"sessions": 0, "minutes": 0},
+        "streak": {"current": 0, "last_date": None},
+        "last_session": None,
+    }
+
+
+def load_rollup(path: Path) -> Dict:
+    if not path.exists():
+        return empty_rollup()
+    try:
+        data = json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return empty_rollup()
+    return data if isinstance(data, dict) else empty_rollup()
+
+
+def save_rollup(rollup: Dict, path: Path) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(rollup), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _entry_date(entry: Dict) -> Optional[date]:
+    try:
+        return datetime.fromisoformat(entry["start"].replace("Z", "")).date()
+    except Exception:
+        return None
+
+
+def _bump(bucket: Dict, minutes: int, session_type: str) -> None:
+    bucket["sessions"] = bucket.get("sessions", 0) + 1
+    bucket["minutes"] = bucket.get("minutes", 0) + minutes
+    types = bucket.setdefault("types", {})
+    types[session_type] = types.get(session_type, 0) + 1
+
+
+def _streak_from_days(days: Dict[str, Dict]) -> Tuple[int, Optional[str]]:
+    """Count consecutive days ending at the most recent logged day."""
+    if not days:
+        return 0, None
+    ordered = sorted(days, reverse=True)
+    streak = 1
+    current = date.fromisoformat(ordered[0])
+    for iso in ordered[1:]:
+        day = date.fromisoformat(iso)
+        if (current - day).days != 1:
+            break
+        streak += 1
+        current = day
+    return streak, ordered[0]
+
+
+def add_entry(rollup: Dict, entry: Dict) -> None:
+    """Fold one focus log *entry* into *rollup* in place."""
+    minutes = int(entry.get("session_length") or 0)
+    totals = rollup["totals"]
+    totals["sessions"] += 1
+    totals["minutes"] += minutes
+
+    day = _entry_date(entry)
+    if day is None:
+        return
+    iso = day.isoformat()
+    session_type = entry.get("session_type", "")
+    project_id = entry.get("project_id", "default")
+    new_day = iso not in rollup["days"]
+
+    _bump(rollup["days"].setdefault(iso, {}), minutes, session_type)
+    _bump(rollup["projects"].setdefault(project_id, {}).setdefault(iso, {}), minutes, session_type)
+
+    last = rollup.get("last_session")
+    if last is None or entry.get("start", "") >= last.get("start", ""):
+        rollup["last_session"] = entry
+
+    if not new_day:
+        return
+    streak = rollup["streak"]
+    last_date = streak.get("last_date")
+    if last_date is None:
+        streak["current"], streak["last_date"] = 1, iso
+        return
+    gap = (day - date.fromisoformat(last_date)).days
+    if gap == 1:
+        streak["current"] += 1
+        streak["last_date"] = iso
+    elif gap > 1:
+        streak["current"], streak["last_date"] = 1, iso
+    else:
+        # An older day was back-filled and may join two runs.
+        streak["current"], streak["last_date"] = _streak_from_days(rollup["days"])
+
+
+def record_session(entry: Dict, rollup_path: Path) -> None:
+    """Load the rollup at *rollup_path*, add *entry* and write it back."""
+    rollup = load_rollup(rollup_path)
+    add_entry(rollup, entry)
+    save_rollup(rollup, rollup_path)
+
+
+def rebuild(log_path: Path, rollup_path: Path) -> Dict:
+    """Recompute the rollup from the raw focus log."""
+    rollup = empty_rollup()
+    if log_path.exists():
+        try:
+            log = json.loads(log_path.read_text())
+        except json.JSONDecodeError:
+            log = []
+        for entry in log if isinstance(log, list) else []:
+            if isinstance(entry, dict):
+                add_entry(rollup, entry)
+    save_rollup(rollup, rollup_path)
+    return rollup
+
+
+def load_current(log_path: Path, rollup_path: Path) -> Dict:
+    """Return the rollup, rebuilding it when the log was written without it."""
+    if log_path.exists() and (
+        not rollup_path.exists() or log_path.stat().st_mtime > rollup_path.stat().st_mtime
+    ):
+        return rebuild(log_path, rollup_path)
+    return load_rollup(rollup_path)
+
+
+def current_streak(rollup: Dict) -> int:
+    return rollup["streak"]["current"]
+
+
+def _days_for(rollup: Dict, project_id: Optional[str]) -> Dict[str, Dict]:
+    if project_id is None:
+        return rollup["days"]
+    return rollup["projects"].get(project_id, {})
+
+
+def weekly_totals(rollup: Dict, project_id: Optional[str] = None) -> Dict[str, int]:
+    """Return minutes per ISO week (``YYYY-Www``)."""
+    weeks: Dict[str, int] = {}
+    for iso, bucket in _days_for(rollup, project_id).items():
+        year, week, _ = date.fromisoformat(iso).isocalendar()
+        key = f"{year}-W{week:02d}"
+        weeks[key] = weeks.get(key, 0) + bucket.get("minutes", 0)
+    return dict(sorted(weeks.items()))
+
+
+def heatmap(
+    rollup: Dict, end: date, days: int = 365, project_id: Optional[str] = None
+) -> List[Tuple[str, int]]:
+    """Return ``(date, minutes)`` for each of the *days* days ending at *end*."""
+    buckets = _days_for(rollup, project_id)
+    start = end - timedelta(days=days - 1)
+    out = []
+    for n in range(days):
+        iso = (start + timedelta(days=n)).isoformat()
+        out.append((iso, buckets.get(iso, {}).get("minutes", 0)))
+    return out
+
+
+def main() -> None:
+    base_dir = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Focus log rollups")
+    parser.add_argument("--log", default=str(base_dir / "focus_log.json"), help="Focus log path")
+    parser.add_argument(
+        "--rollup", default=str(base_dir / "focus_rollup.json"), help="Rollup file path"
+    )
+    parser.add_argument("--rebuild", action="store_true", help="Recompute rollups from the log")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rollup = rebuild(Path(args.log), Path(args.rollup))
+        print(f"Rebuilt {len(rollup['days'])} days of rollups into {args.rollup}")
+    else:
+        rollup = load_rollup(Path(args.rollup))
+    print(f"Current streak: {current_streak(rollup)} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Deadline scheduler for focus sessions.
+
+One background thread sleeps until the earliest session deadline (kept in a
+heap) instead of running a ticking thread per session. Active sessions are
+persisted so they survive restarts; sessions that expired while the app was
+down are completed as soon as the scheduler starts.
+
+The state file holds a snapshot of the active sessions and a journal beside
+it (``<state>.jsonl``) records each add, cancel and completion as one line,
+so a change costs one append however many sessions are running. The
+journal is folded into the snapshot once it has ``COMPACT_AFTER`` records.
+
+A session stays in the state file until its expiry hook has returned, so a
+crash or a failing hook means it is retried rather than lost (delivery is
+at-least-once). The scheduler is single-process: it owns its state file
+outright, and a second scheduler on the same file would overwrite its
+sessions and log expired ones twice. :meth:`FocusScheduler.start` takes an
+exclusive lock on ``<state>.lock`` and refuses to start if another process
+holds it; such a process must not call :meth:`~FocusScheduler.add` or
+:meth:`~FocusScheduler.cancel` either.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+COMPLETED_HISTORY = 1024
+# Seconds before a session whose expiry hook failed is tried again.
+RETRY_DELAY = 60.0
+# Journal records after which the snapshot is rewritten.
+COMPACT_AFTER = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class FocusSession:
+    """A running focus session; times are POSIX timestamps."""
+
+    __slots__ = ("session_id", "start", "deadline", "session_type", "project_id")
+
+    def __init__(
+        self, session_id: str, start: float, deadline: float, session_type: str, project_id: str
+    ) -> None:
+        self.session_id = session_id
+        self.start = start
+        self.deadline = deadline
+        self.session_type = session_type
+        self.project_id = project_id
+
+    def to_dict(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "start": self.start,
+            "deadline": self.deadline,
+            "session_type": self.session_type,
+            "project_id": self.project_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FocusSession":
+        return cls(
+            data["session_id"],
+            float(data["start"]),
+            float(data["deadline"]),
+            data.get("session_type", "read"),
+            data.get("project_id", "default"),
+        )
+
+
+class FocusScheduler:
+    """Track many focus sessions by deadline and call *on_expire* for each.
+
+    Parameters
+    ----------
+    state_path : Path
+        JSON file holding the active sessions.
+    on_expire : callable
+        Called with each :class:`FocusSession` once its deadline has passed,
+        outside the scheduler lock.
+    clock : callable, optional
+        Returns the current POSIX time; injectable for tests.
+    """
+
+    def __init__(
+        self,
+        state_path: Path,
+        on_expire: Callable[[FocusSession], None],
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.state_path = state_path
+        self.on_expire = on_expire
+        self.clock = clock
+        self._sessions: Dict[str, FocusSession] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._completed: "OrderedDict[str, float]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+        self.journal_path = self.state_path.with_suffix(".jsonl")
+        self._journal_records = 0
+        self._load()
+
+    def _load(self) -> None:
+        data = []
+        if self.state_path.exists():
+            try:
+                data = json.loads(self.state_path.read_text())
+            except json.JSONDecodeError:
+                data = []
+        for item in data if isinstance(data, list) else []:
+            try:
+                session = FocusSession.from_dict(item)
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._sessions[session.session_id] = session
+        if self.journal_path.exists():
+            with self.journal_path.open(encoding="utf-8") as f:
+                for line in f:
+                    self._journal_records += 1
+                    try:
+                        self._replay(json.loads(line))
+                    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                        # A line cut short by a crash mid-append.
+                        continue
+        self._heap = [(s.deadline, s.session_id) for s in self._sessions.values()]
+        heapq.heapify(self._heap)
+
+    def _replay(self, record: Dict) -> None:
+        if "add" in record:
+            session = FocusSession.from_dict(record["add"])
+            self._sessions[session.session_id] = session
+        else:
+            self._sessions.pop(record.get("done") or record["cancel"], None)
+
+    def _record(self, record: Dict) -> None:
+        """Append *record* to the journal; callers hold ``_cond``."""
+        if self._journal_records >= COMPACT_AFTER:
+            self._save()
+        data = (json.dumps(record) + "\n").encode("utf-8")
+        with self.journal_path.open("a+b") as f:
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+        self._journal_records += 1
+
+    def _save(self) -> None:
+        """Write the snapshot and empty the journal it now contains."""
+        data = [s.to_dict() for s in self._sessions.values()]
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+        self.journal_path.unlink(missing_ok=True)
+        self._journal_records = 0
+
+    def _acquire_owner_lock(self) -> bool:
+        lock_path = self.state_path.with_name(self.state_path.name + ".lock")
+        f = lock_path.open("a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    def start(self) -> None:
+        """Start the background thread if it is not already running.
+
+        Raises ``RuntimeError`` if another process already runs a scheduler
+        on the same state file.
+        """
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._lock_file is None and not self._acquire_owner_lock():
+                raise RuntimeError(
+                    f"{self.state_path} is owned by another process; "
+                    "the focus scheduler must run in a single process"
+                )
+            if self._journal_records:
+                self._save()
+            self._thread = threading.Thread(target=self._run, name="focus-scheduler", daemon=True)
+            self._thread.start()
+
+    def add(self, minutes: int, session_type: str, project_id: str) -> FocusSession:
+        """Register a new session of *minutes* starting now."""
+        now = self.clock()
+        session = FocusSession(uuid.uuid4().hex, now, now + minutes * 60, session_type, project_id)
+        with self._cond:
+            self._record({"add": session.to_dict()})
+            self._sessions[session.session_id] = session
+            heapq.heappush(self._heap, (session.deadline, session.session_id))
+            self._cond.notify()
+        return session
+
+    def cancel(self, session_id: str) -> bool:
+        """Drop a session without logging it; its heap entry is skipped lazily."""
+        with self._cond:
+            if self._sessions.pop(session_id, None) is None:
+                return False
+            self._record({"cancel": session_id})
+            return True
+
+    def status(self, session_id: str) -> Optional[Dict]:
+        """Return the state of a running or recently completed session."""
+        with self._cond:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                info = session.to_dict()
+                info["status"] = "running"
+                info["remaining"] = max(0.0, session.deadline - self.clock())
+                return info
+            if session_id in self._completed:
+                return {
+                    "session_id": session_id,
+                    "status": "completed",
+                    "deadline": self._completed[session_id],
+                    "remaining": 0.0,
+                }
+        return None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def run_pending(self, now: Optional[float] = None) -> List[FocusSession]:
+        """Complete every session whose deadline is at or before *now*.
+
+        Each session is removed and its completion journaled only after
+        *on_expire* returned; if the hook raises, the session is kept and retried after
+        ``RETRY_DELAY`` seconds. Returns the sessions completed.
+        """
+        if now is None:
+            now = self.clock()
+        due: List[FocusSession] = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                _, session_id = heapq.heappop(self._heap)
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    due.append(session)
+
+        completed: List[FocusSession] = []
+        for session in due:
+            try:
+                self.on_expire(session)
+            except Exception:
+                logger.exception("Focus session expiry hook failed for %s", session.session_id)
+                with self._cond:
+                    if session.session_id in self._sessions:
+                        heapq.heappush(self._heap, (now + RETRY_DELAY, session.session_id))
+                continue
+            completed.append(session)
+            with self._cond:
+                self._sessions.pop(session.session_id, None)
+                self._completed[session.session_id] = session.deadline
+                if len(self._completed) > COMPLETED_HISTORY:
+                    self._completed.popitem(last=False)
+                self._record({"done": session.session_id})
+        return completed
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._heap and self._heap[0][1] not in self._sessions:
+                    heapq.heappop(self._heap)
+                timeout = self._heap[0][0] - self.clock() if self._heap else None
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+            self.run_pending()
@@ -5,6 +5,10 @@ from pathlib import Path
 import sys
 import time
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils import focus_rollup
+
 VALID_LENGTHS = {25, 50, 90}
 
 
@@ -30,8 +34,13 @@ def log_session(
     session_type: str,
     project_id: str,
     log_path: Path,
+    rollup_path: Path | None = None,
 ) -> None:
-    """Append a completed session entry to the log file."""
+    """Append a completed session entry to the log file.
+
+    The per-day rollup next to the log (``focus_rollup.json`` unless
+    *rollup_path* is given) is updated with the same entry.
+    """
     minutes = int((end - start).total_seconds() // 60)
     log_entry = {
         "start": start.isoformat() + "Z",
@@ -51,6 +60,9 @@ def log_session(
         data = []
     data.append(log_entry)
     log_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    if rollup_path is None:
+        rollup_path = log_path.with_name("focus_rollup.json")
+    focus_rollup.record_session(log_entry, rollup_path)
 
 
 def main() -> None:
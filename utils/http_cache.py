@@ -0,0 +1,138 @@
+"""Conditional GET support for pages rendered from files on disk.
+
+A view decorated with :func:`conditional` declares the files (and any extra
+version strings, such as today's date) it is rendered from. A strong ETag
+and ``Last-Modified`` are derived from ``stat`` results alone, so a
+matching ``If-None-Match`` or ``If-Modified-Since`` gets a 304 before the
+view parses anything, and rendered HTML is reused while the sources are
+unchanged. Views that opt in with ``compress=True`` are gzipped for clients
+that accept it; each encoding gets its own ETag and cache entry.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+from flask import Response, make_response, request
+
+Source = Union[Path, str]
+
+CACHE_SIZE = 256
+GZIP_LEVEL = 6
+GZIP_MIN_BYTES = 1024
+
+_rendered: "OrderedDict[Tuple, Tuple[bytes, str]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def source_version(sources: Iterable[Source]) -> Tuple[str, Optional[float]]:
+    """Return a version token and the newest mtime for *sources*.
+
+    ``Path`` items contribute their inode, size and nanosecond mtime (or
+    ``missing``); strings are mixed in verbatim. The mtime is ``None``
+    unless every source is an existing path: a version string (such as
+    today's date) or a file that may appear later can change the page
+    without any mtime moving forward, so no ``Last-Modified`` is possible.
+    """
+    digest = hashlib.sha1()
+    newest: Optional[float] = None
+    dated = True
+    for src in sources:
+        if isinstance(src, Path):
+            try:
+                st = src.stat()
+            except OSError:
+                token = f"{src}:missing"
+                dated = False
+            else:
+                token = f"{src}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+                newest = st.st_mtime if newest is None else max(newest, st.st_mtime)
+        else:
+            token = src
+            dated = False
+        digest.update(token.encode("utf-8", "surrogateescape"))
+        digest.update(b"\0")
+    return digest.hexdigest(), newest if dated else None
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def clear_cache() -> None:
+    with _lock:
+        _rendered.clear()
+
+
+def conditional(sources: Callable[..., Iterable[Source]], compress: bool = False) -> Callable:
+    """Decorate a GET view whose output depends only on *sources*.
+
+    *sources* is called with the view's keyword arguments inside the request
+    context and returns the paths and version strings the page is built
+    from. Query arguments are part of the cache key automatically. With
+    *compress*, bodies of at least ``GZIP_MIN_BYTES`` are sent gzipped when
+    the client accepts it.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in {"GET", "HEAD"}:
+                return view(*args, **kwargs)
+
+            encoding = "gzip" if compress and "gzip" in request.accept_encodings else ""
+            route_key = (request.endpoint, tuple(sorted(request.args.items(multi=True))), encoding)
+            version, mtime = source_version(sources(**kwargs))
+            etag = hashlib.sha1(f"{route_key!r}\0{version}".encode("utf-8")).hexdigest()
+            last_modified = (
+                datetime.fromtimestamp(int(mtime), tz=timezone.utc) if mtime is not None else None
+            )
+
+            if _not_modified(etag, last_modified):
+                resp = Response(status=304)
+            else:
+                key = (route_key, etag)
+                with _lock:
+                    cached = _rendered.get(key)
+                    if cached is not None:
+                        _rendered.move_to_end(key)
+                if cached is not None:
+                    resp = Response(cached[0], mimetype=cached[1])
+                    if cached[2]:
+                        resp.headers["Content-Encoding"] = cached[2]
+                else:
+                    resp = make_response(view(*args, **kwargs))
+                    if resp.status_code != 200:
+                        return resp
+                    if not resp.is_streamed:
+                        body = resp.get_data()
+                        if encoding and len(body) >= GZIP_MIN_BYTES:
+                            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+                            resp.set_data(body)
+                            resp.headers["Content-Encoding"] = encoding
+                        with _lock:
+                            _rendered[key] = (body, resp.mimetype, resp.headers.get("Content-Encoding"))
+                            while len(_rendered) > CACHE_SIZE:
+                                _rendered.popitem(last=False)
+
+            if compress:
+                resp.vary.add("Accept-Encoding")
+            resp.set_etag(etag)
+            if last_modified is not None:
+                resp.last_modified = last_modified
+            resp.cache_control.no_cache = True
+            return resp
+
+        return wrapper
+
+    return decorator
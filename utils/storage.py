@@ -0,0 +1,179 @@
+"""Transparent compressed storage for project files.
+
+Writers name files by their logical path (``notes.md``,
+``transcript_chunks.json``) and the configured codec decides what lands on
+disk: ``notes.md.gz`` with gzip, ``notes.md.xz`` with lzma, or the plain
+file. Readers resolve a logical path to whichever variant exists, so files
+written before compression was enabled keep working. Data is streamed
+through the codec rather than compressed in memory.
+
+The codec and level come from the environment and are read on every write::
+
+    AUTODIDACT_COMPRESSION=gzip|xz|none   (default gzip)
+    AUTODIDACT_COMPRESSION_LEVEL=0-9      (default 6)
+
+gzip is the default because a stored ``.gz`` can be sent to HTTP clients
+as-is with ``Content-Encoding: gzip``. Writers of files that are read at
+byte offsets pass ``codec="none"`` to keep them plain.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import lzma
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+CODECS = {"none": "", "gzip": ".gz", "xz": ".xz"}
+ALIASES = {"": "none", "off": "none", "gz": "gzip", "zlib": "gzip", "lzma": "xz"}
+SUFFIXES = {suffix: codec for codec, suffix in CODECS.items() if suffix}
+DEFAULT_CODEC = "gzip"
+DEFAULT_LEVEL = 6
+STREAM_BLOCK = 64 * 1024
+
+
+def settings() -> Tuple[str, int]:
+    """Return the ``(codec, level)`` configured in the environment."""
+    codec = os.environ.get("AUTODIDACT_COMPRESSION", DEFAULT_CODEC).strip().lower()
+    codec = ALIASES.get(codec, codec)
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec: {codec}")
+    level = int(os.environ.get("AUTODIDACT_COMPRESSION_LEVEL", DEFAULT_LEVEL))
+    if not 0 <= level <= 9:
+        raise ValueError("Compression level must be between 0 and 9")
+    return codec, level
+
+
+def codec_of(stored: Path) -> str:
+    return SUFFIXES.get(stored.suffix, "none")
+
+
+def logical(path: PathLike) -> Path:
+    """Strip a compression suffix: ``notes.md.gz`` -> ``notes.md``."""
+    path = Path(path)
+    return path.with_suffix("") if path.suffix in SUFFIXES else path
+
+
+def variants(path: PathLike) -> List[Path]:
+    path = logical(path)
+    return [path] + [path.with_name(path.name + suffix) for suffix in SUFFIXES]
+
+
+def resolve(path: PathLike) -> Path:
+    """Return the stored file for logical *path*.
+
+    A plain file wins over compressed variants; if nothing exists the plain
+    path is returned so ``resolve(p).exists()`` can be used as a test.
+    """
+    options = variants(path)
+    for candidate in options:
+        if candidate.exists():
+            return candidate
+    return options[0]
+
+
+def exists(path: PathLike) -> bool:
+    return any(candidate.exists() for candidate in variants(path))
+
+
+def glob(directory: Path, pattern: str) -> List[Path]:
+    """Return the logical paths in *directory* matching *pattern*."""
+    found = set()
+    for suffix in ("", *SUFFIXES):
+        for stored in directory.glob(pattern + suffix):
+            found.add(logical(stored))
+    return sorted(found)
+
+
+def open_read(path: PathLike, text: bool = False) -> IO:
+    """Open logical *path* for reading, decompressing as needed."""
+    stored = resolve(path)
+    mode = "rt" if text else "rb"
+    codec = codec_of(stored)
+    if codec == "gzip":
+        return gzip.open(stored, mode, encoding="utf-8" if text else None)
+    if codec == "xz":
+        return lzma.open(stored, mode, encoding="utf-8" if text else None)
+    return open(stored, mode, encoding="utf-8" if text else None)
+
+
+def read_bytes(path: PathLike) -> bytes:
+    with open_read(path) as f:
+        return f.read()
+
+
+def read_text(path: PathLike) -> str:
+    return read_bytes(path).decode("utf-8")
+
+
+def read_json(path: PathLike):
+    return json.loads(read_bytes(path))
+
+
+def iter_stored(path: PathLike, decompress: bool = True) -> Iterator[bytes]:
+    """Yield the file in blocks, decompressed unless *decompress* is false."""
+    stream = open_read(path) if decompress else open(resolve(path), "rb")
+    with stream:
+        while True:
+            block = stream.read(STREAM_BLOCK)
+            if not block:
+                return
+            yield block
+
+
+@contextmanager
+def open_write(path: PathLike, text: bool = False, codec: Optional[str] = None) -> Iterator[IO]:
+    """Write logical *path* with the configured codec, or *codec* if given.
+
+    Output goes to a temporary file that replaces the target on success,
+    after which any other stored variant of *path* is removed.
+    """
+    configured, level = settings()
+    codec = ALIASES.get(codec, codec) if codec is not None else configured
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec: {codec}")
+    path = logical(path)
+    stored = path.with_name(path.name + CODECS[codec])
+    tmp = stored.with_name(f".{stored.name}.tmp")
+    mode = "wt" if text else "wb"
+    encoding = "utf-8" if text else None
+    if codec == "gzip":
+        f = gzip.open(tmp, mode, compresslevel=level, encoding=encoding)
+    elif codec == "xz":
+        f = lzma.open(tmp, mode, preset=level, encoding=encoding)
+    else:
+        f = open(tmp, mode, encoding=encoding)
+    try:
+        with f:
+            yield f
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, stored)
+    for other in variants(path):
+        if other != stored:
+            other.unlink(missing_ok=True)
+
+
+def write_bytes(path: PathLike, data: bytes) -> Path:
+    with open_write(path) as f:
+        f.write(data)
+    return logical(path)
+
+
+def write_text(path: PathLike, text: str) -> Path:
+    return write_bytes(path, text.encode("utf-8"))
+
+
+def write_json(path: PathLike, data) -> Path:
+    """Write *data* as compact JSON; compression makes pretty-printing moot."""
+    return write_bytes(path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+def stored_size(path: PathLike) -> int:
+    return resolve(path).stat().st_size
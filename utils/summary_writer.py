@@ -3,12 +3,15 @@
 from pathlib import Path
 import argparse
 import json
+from typing import Iterable, Union
 
 
-def generate_summary(paragraph: str) -> str:
+def generate_summary(paragraph: Union[str, Iterable[str]]) -> str:
     """Return a three-sentence summary for *paragraph*.
 
-    This implementation is a stub and simply returns a placeholder summary.
+    *paragraph* may be a string or an iterable of text chunks, which a real
+    implementation would summarize chunk by chunk and then combine. This
+    implementation is a stub and simply returns a placeholder summary.
     """
     return (
         "This is summary sentence one. "
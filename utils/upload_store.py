@@ -0,0 +1,264 @@
+"""Resumable chunked uploads written straight to disk.
+
+Each upload gets an ID, a ``<id>.part`` data file and a ``<id>.json`` state
+file under ``<upload_dir>/.partial``. Chunks are appended at an explicit byte
+offset while a SHA-256 of the received bytes is updated as they arrive, so
+the request body is read once and never buffered in memory.
+
+Writes and commits of one upload are serialized by an ``<id>.lock`` file
+that is linked into place atomically, so they also exclude each other across worker
+processes, while different uploads proceed in parallel. A request that finds
+the lock taken fails with :class:`UploadBusy` instead of waiting behind a
+possibly slow chunk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+PARTIAL_DIRNAME = ".partial"
+READ_SIZE = 1024 * 1024
+UPLOAD_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+# upload_id -> (hasher, number of bytes it has consumed); guarded by _hashers_lock
+_hashers: Dict[str, Tuple["hashlib._Hash", int]] = {}
+_hashers_lock = threading.Lock()
+
+
+class OffsetMismatch(ValueError):
+    """Raised when a chunk does not start where the stored data ends."""
+
+    def __init__(self, expected: int, received: int) -> None:
+        super().__init__(f"Expected offset {expected}, got {received}")
+        self.expected = expected
+
+
+class UploadBusy(RuntimeError):
+    """Raised when another request is writing or committing the same upload."""
+
+
+def _paths(upload_dir: Path, upload_id: str) -> Tuple[Path, Path]:
+    if not UPLOAD_ID_RE.fullmatch(upload_id):
+        raise FileNotFoundError(f"Unknown upload: {upload_id}")
+    partial = upload_dir / PARTIAL_DIRNAME
+    return partial / f"{upload_id}.part", partial / f"{upload_id}.json"
+
+
+def _write_state(state_path: Path, state: Dict) -> None:
+    tmp = state_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, state_path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lock_owner(content: str) -> Optional[int]:
+    """Return the PID recorded in a lock file, ``None`` if unreadable."""
+    try:
+        return int(content.split()[0])
+    except (IndexError, ValueError):
+        return None
+
+
+@contextmanager
+def _upload_lock(part_path: Path) -> Iterator[None]:
+    """Hold ``<id>.lock`` for the duration of the block.
+
+    The lock is written to a temporary file and linked into place, so it is
+    never seen without its content: the owner's PID and a token unique to
+    this holder. A lock whose PID no longer exists is broken and taken over;
+    anything unreadable counts as held. On release the lock is removed only
+    if it still carries our token.
+    """
+    lock_path = part_path.with_suffix(".lock")
+    token = f"{os.getpid()} {uuid.uuid4().hex}"
+    tmp = lock_path.with_name(f"{lock_path.name}.{token.split()[1]}.tmp")
+    tmp.write_text(token, encoding="ascii")
+    try:
+        for _ in range(2):
+            try:
+                os.link(tmp, lock_path)
+                break
+            except FileExistsError:
+                pass
+            try:
+                content = lock_path.read_text(encoding="ascii")
+            except FileNotFoundError:
+                continue
+            except (OSError, UnicodeDecodeError):
+                content = ""
+            owner = _lock_owner(content)
+            if owner is None or _pid_alive(owner):
+                raise UploadBusy(f"Upload {part_path.stem} is busy")
+            _break_stale_lock(lock_path, content)
+        else:
+            raise UploadBusy(f"Upload {part_path.stem} is busy")
+    finally:
+        tmp.unlink(missing_ok=True)
+    try:
+        yield
+    finally:
+        try:
+            if lock_path.read_text(encoding="ascii") == token:
+                lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _break_stale_lock(lock_path: Path, content: str) -> None:
+    """Remove *lock_path* if it still holds the stale *content*.
+
+    The lock is moved aside first; if another request replaced it in the
+    meantime, that fresh lock is linked back instead of being deleted.
+    """
+    aside = lock_path.with_name(f"{lock_path.name}.{uuid.uuid4().hex}.stale")
+    try:
+        os.rename(lock_path, aside)
+    except FileNotFoundError:
+        return
+    try:
+        if aside.read_text(encoding="ascii") != content:
+            try:
+                os.link(aside, lock_path)
+            except FileExistsError:
+                pass
+    finally:
+        aside.unlink(missing_ok=True)
+
+
+def _hasher_at(upload_id: str, part_path: Path, offset: int) -> "hashlib._Hash":
+    """Return a hasher that has consumed exactly *offset* bytes of the upload.
+
+    The in-memory hasher is reused when it is in sync; after a restart, or
+    when another worker received earlier chunks, the stored bytes are hashed
+    once from disk instead. Callers hold the upload's lock.
+    """
+    with _hashers_lock:
+        cached = _hashers.get(upload_id)
+    if cached is not None and cached[1] == offset:
+        return cached[0]
+    hasher = hashlib.sha256()
+    with part_path.open("rb") as f:
+        remaining = offset
+        while remaining:
+            block = f.read(min(READ_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def create_upload(
+    upload_dir: Path, filename: str, project: str = "default", size: Optional[int] = None
+) -> Dict:
+    """Start a new upload of *filename* and return its state."""
+    partial = upload_dir / PARTIAL_DIRNAME
+    partial.mkdir(parents=True, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    part_path, state_path = _paths(upload_dir, upload_id)
+    part_path.touch()
+    state = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "project": project,
+        "size": size,
+        "offset": 0,
+        "created": datetime.utcnow().isoformat() + "Z",
+    }
+    _write_state(state_path, state)
+    with _hashers_lock:
+        _hashers[upload_id] = (hashlib.sha256(), 0)
+    return state
+
+
+def get_upload(upload_dir: Path, upload_id: str) -> Dict:
+    """Return the state of an upload; ``offset`` is where the next chunk goes."""
+    part_path, state_path = _paths(upload_dir, upload_id)
+    if not state_path.exists() or not part_path.exists():
+        raise FileNotFoundError(f"Unknown upload: {upload_id}")
+    state = json.loads(state_path.read_text())
+    state["offset"] = part_path.stat().st_size
+    return state
+
+
+def write_chunk(upload_dir: Path, upload_id: str, offset: int, stream) -> Dict:
+    """Copy *stream* into the upload at *offset*, hashing while receiving.
+
+    *offset* must equal the number of bytes already stored, which lets a
+    client resume after a dropped connection by asking for the current
+    offset. Bytes received before a disconnect are kept. Raises
+    :class:`UploadBusy` while another chunk of the same upload is in flight.
+    """
+    part_path, state_path = _paths(upload_dir, upload_id)
+    if not part_path.exists():
+        raise FileNotFoundError(f"Unknown upload: {upload_id}")
+    with _upload_lock(part_path):
+        state = get_upload(upload_dir, upload_id)
+        current = state["offset"]
+        if offset != current:
+            raise OffsetMismatch(current, offset)
+        hasher = _hasher_at(upload_id, part_path, current)
+        size = state.get("size")
+        try:
+            with part_path.open("r+b") as f:
+                f.seek(current)
+                while True:
+                    block = stream.read(READ_SIZE)
+                    if not block:
+                        break
+                    if size is not None and current + len(block) > size:
+                        raise ValueError(f"Upload exceeds declared size of {size} bytes")
+                    f.write(block)
+                    hasher.update(block)
+                    current += len(block)
+        finally:
+            with _hashers_lock:
+                _hashers[upload_id] = (hasher, current)
+            state["offset"] = current
+            _write_state(state_path, state)
+    return state
+
+
+def commit_upload(
+    upload_dir: Path, upload_id: str, sha256: Optional[str] = None
+) -> Tuple[Path, str]:
+    """Move a finished upload into *upload_dir* and return its path and hash.
+
+    Raises ``ValueError`` when the upload is shorter than its declared size
+    or when *sha256* does not match the received bytes.
+    """
+    part_path, state_path = _paths(upload_dir, upload_id)
+    if not part_path.exists():
+        raise FileNotFoundError(f"Unknown upload: {upload_id}")
+    with _upload_lock(part_path):
+        state = get_upload(upload_dir, upload_id)
+        size = state.get("size")
+        if size is not None and state["offset"] != size:
+            raise ValueError(f"Upload incomplete: {state['offset']} of {size} bytes")
+        digest = _hasher_at(upload_id, part_path, state["offset"]).hexdigest()
+        if sha256 and sha256.lower() != digest:
+            raise ValueError("Checksum mismatch")
+        dest = upload_dir / state["filename"]
+        os.replace(part_path, dest)
+        state_path.unlink()
+        with _hashers_lock:
+            _hashers.pop(upload_id, None)
+    return dest, digest
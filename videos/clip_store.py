@@ -0,0 +1,174 @@
+"""Per-video clip store with interval overlap queries.
+
+Each video's clips are kept coalesced: a new clip that overlaps or touches
+(within ``ADJACENT_GAP`` seconds) existing ones is merged with them, so the
+stored intervals are disjoint and their start and end arrays are both
+sorted. Overlap and stabbing queries are then two ``bisect`` calls plus a
+slice of the ``k`` hits, O(log n + k), with no tree to maintain.
+
+Clips are stored one JSON file per video under the store directory and
+written atomically; clips from the old global ``video_clips.json`` can be
+imported with :meth:`ClipStore.import_legacy`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ADJACENT_GAP = 0.5
+UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+Interval = Tuple[float, float]
+
+
+def parse_time(value) -> float:
+    """Return *value* in seconds; raise ``ValueError`` unless finite and >= 0.
+
+    NaN in particular must not reach the sorted arrays, where every
+    comparison with it is false and bisection stops working.
+    """
+    try:
+        t = float(value)
+    except TypeError:
+        raise ValueError(f"Invalid time: {value!r}") from None
+    if not math.isfinite(t) or t < 0:
+        raise ValueError(f"Invalid time: {value!r}")
+    return t
+
+
+class VideoClips:
+    """Sorted, disjoint clip intervals of one video."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, starts: Optional[List[float]] = None, ends: Optional[List[float]] = None) -> None:
+        self.starts = starts or []
+        self.ends = ends or []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, start: float, end: float, gap: float = ADJACENT_GAP) -> Interval:
+        """Insert ``[start, end]``, merging neighbours; return the merged clip."""
+        if end < start:
+            start, end = end, start
+        lo = bisect_left(self.ends, start - gap)
+        hi = bisect_right(self.starts, end + gap)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+        return start, end
+
+    def overlapping(self, start: float, end: float) -> List[Interval]:
+        """Return clips intersecting ``[start, end]`` in time order."""
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        return list(zip(self.starts[lo:hi], self.ends[lo:hi]))
+
+    def at(self, t: float) -> Optional[Interval]:
+        """Return the clip containing *t*, if any."""
+        hits = self.overlapping(t, t)
+        return hits[0] if hits else None
+
+    def to_dict(self) -> Dict:
+        return {"starts": self.starts, "ends": self.ends}
+
+
+class ClipStore:
+    """Clip intervals for many videos, one file per video under *root*."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[int, VideoClips]] = {}
+
+    def _path(self, video: str) -> Path:
+        digest = hashlib.sha1(video.encode("utf-8")).hexdigest()[:8]
+        return self.root / f"{UNSAFE_RE.sub('_', video)[:80]}-{digest}.json"
+
+    def _load(self, video: str) -> VideoClips:
+        """Return the clips of *video*, rereading the file if it changed."""
+        path = self._path(video)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        cached = self._cache.get(video)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        clips = VideoClips()
+        if mtime is not None:
+            try:
+                data = json.loads(path.read_text())
+                clips = VideoClips(list(map(float, data["starts"])), list(map(float, data["ends"])))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                clips = VideoClips()
+        self._cache[video] = (mtime, clips)
+        return clips
+
+    def _save(self, video: str, clips: VideoClips) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(video)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps({"video": video, **clips.to_dict()}), encoding="utf-8")
+        os.replace(tmp, path)
+        self._cache[video] = (path.stat().st_mtime_ns, clips)
+
+    def add(self, video: str, start: float, end: float) -> Interval:
+        start, end = parse_time(start), parse_time(end)
+        with self._lock:
+            clips = self._load(video)
+            merged = clips.add(start, end)
+            self._save(video, clips)
+        return merged
+
+    def overlapping(self, video: str, start: float, end: float) -> List[Interval]:
+        with self._lock:
+            return self._load(video).overlapping(start, end)
+
+    def at(self, video: str, t: float) -> Optional[Interval]:
+        with self._lock:
+            return self._load(video).at(t)
+
+    def clips(self, video: str) -> List[Interval]:
+        with self._lock:
+            clips = self._load(video)
+            return list(zip(clips.starts, clips.ends))
+
+    def import_legacy(self, legacy_path: Path) -> int:
+        """Merge clips from the old global list file and rename it.
+
+        Returns the number of clips read. The file is renamed to
+        ``<name>.imported`` so the import happens once; importing the same
+        clips twice would be harmless anyway since they coalesce.
+        """
+        try:
+            entries = json.loads(legacy_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        by_video: Dict[str, List[Interval]] = {}
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                by_video.setdefault(str(entry["video"]), []).append(
+                    (parse_time(entry["start"]), parse_time(entry["end"]))
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        with self._lock:
+            for video, intervals in by_video.items():
+                clips = self._load(video)
+                for start, end in intervals:
+                    clips.add(start, end)
+                self._save(video, clips)
+        os.replace(legacy_path, legacy_path.with_name(legacy_path.name + ".imported"))
+        return sum(len(v) for v in by_video.values())
@@ -1,8 +1,12 @@
 from __future__ import annotations
 import json
+import sys
 from pathlib import Path
 from typing import List, Dict, Optional
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils import storage
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 
@@ -11,11 +15,11 @@ def list_videos() -> List[Dict[str, Optional[str]]]:
     """Return metadata for each mp4 file found in the data directory."""
     videos: List[Dict[str, Optional[str]]] = []
     for file in DATA_DIR.glob("*.mp4"):
-        transcript = DATA_DIR / f"{file.stem}_transcript.txt"
-        chunks = DATA_DIR / f"{file.stem}_chunks.json"
+        transcript = storage.resolve(DATA_DIR / f"{file.stem}_transcript.txt")
+        chunks = storage.resolve(DATA_DIR / f"{file.stem}_chunks.json")
         if chunks.exists():
             try:
-                chunk_data = json.loads(chunks.read_text())
+                chunk_data = storage.read_json(chunks)
                 duration = chunk_data[-1].get("end", 0) if chunk_data else 0
             except json.JSONDecodeError:
                 duration = 0
@@ -33,6 +37,21 @@ def list_videos() -> List[Dict[str, Optional[str]]]:
     return videos
 
 
+def library_sources() -> List[Path]:
+    """Return the paths whose changes affect :func:`list_videos`."""
+    return [DATA_DIR, *(storage.resolve(p) for p in storage.glob(DATA_DIR, "*_chunks.json"))]
+
+
+def metadata_sources(filename: str) -> List[Path]:
+    """Return the paths read by :func:`get_video_metadata` for *filename*."""
+    path = DATA_DIR / filename
+    return [
+        path,
+        storage.resolve(DATA_DIR / f"{path.stem}_transcript.txt"),
+        storage.resolve(DATA_DIR / f"{path.stem}_chunks.json"),
+    ]
+
+
 def get_video_metadata(filename: str) -> Dict[str, Optional[str]]:
     """Return metadata for a single video."""
     path = DATA_DIR / filename
@@ -41,14 +60,14 @@ def get_video_metadata(filename: str) -> Dict[str, Optional[str]]:
     transcript = DATA_DIR / f"{path.stem}_transcript.txt"
     chunks = DATA_DIR / f"{path.stem}_chunks.json"
     chunk_data = []
-    if chunks.exists():
+    if storage.exists(chunks):
         try:
-            chunk_data = json.loads(chunks.read_text())
+            chunk_data = storage.read_json(chunks)
         except json.JSONDecodeError:
             chunk_data = []
     return {
         "filename": filename,
         "path": str(path),
-        "transcript": transcript.read_text() if transcript.exists() else "",
+        "transcript": storage.read_text(transcript) if storage.exists(transcript) else "",
         "chunks": chunk_data,
     }